@@ -1,14 +1,37 @@
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth, HTTPDigestAuth
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+from urllib.parse import urljoin
 import json
 import os
 
+# Keys under which paginated APIs usually return their records
+RECORDS_KEYS = ["items", "data", "results", "records", "entries"]
+
+# Keys under which paginated APIs usually return the next page URL or cursor
+NEXT_KEYS = ["next", "next_url", "nextUrl", "next_cursor", "nextCursor", "next_page_token", "nextPageToken"]
+
+# Keys under which paginated APIs usually report the total number of records
+TOTAL_KEYS = ["total", "total_count", "totalCount", "total_results", "totalResults", "total_items", "totalItems"]
+
 class APIClient:
-    def __init__(self):
+    def __init__(self, pool_size=10, cache=None):
         self.headers = {}
         self.auth = None
         self.last_response = None
         self.last_url = None
+        
+        # Optional HTTPCache used for GET requests
+        self.cache = cache
+        
+        # One session per client keeps connections alive between calls
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
     def set_header(self, key, value):
        
@@ -29,12 +52,17 @@ class APIClient:
         
         self.last_url = url
         try:
-            self.last_response = requests.get(
-                url, 
-                headers=self.headers,
-                params=params,
-                auth=self.auth
-            )
+            if self.cache is not None:
+                self.last_response = self.cache.get(
+                    self.session, url, params=params, headers=self.headers, auth=self.auth
+                )
+            else:
+                self.last_response = self.session.get(
+                    url, 
+                    headers=self.headers,
+                    params=params,
+                    auth=self.auth
+                )
             return self.last_response
         except Exception as e:
             print(f"Error during GET request: {e}")
@@ -44,7 +72,7 @@ class APIClient:
         
         self.last_url = url
         try:
-            self.last_response = requests.post(
+            self.last_response = self.session.post(
                 url, 
                 headers=self.headers,
                 data=data,
@@ -55,6 +83,194 @@ class APIClient:
         except Exception as e:
             print(f"Error during POST request: {e}")
             return None
+    
+    def _request(self, method, url, **kwargs):
+        """Send a request without touching last_response (safe to call from threads)"""
+        try:
+            if method == "GET" and self.cache is not None:
+                return self.cache.get(self.session, url, headers=self.headers, auth=self.auth, **kwargs)
+            return self.session.request(method, url, headers=self.headers, auth=self.auth, **kwargs)
+        except Exception as e:
+            print(f"Error during {method} request to {url}: {e}")
+            return None
+    
+    def _run_many(self, calls, concurrency):
+        """
+        Run (key, callable) pairs on a thread pool and yield (key, result)
+        as they complete. At most 2 * concurrency calls are pending at once,
+        so long or lazy inputs are not loaded into memory.
+        """
+        calls = iter(calls)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = {}
+            while True:
+                while len(pending) < concurrency * 2:
+                    try:
+                        key, call = next(calls)
+                    except StopIteration:
+                        break
+                    pending[executor.submit(call)] = key
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+    
+    def get_many(self, urls, params=None, concurrency=None):
+        """
+        GET many URLs concurrently over the pooled session.
+        
+        Yields (url, response) tuples in completion order; response is None
+        if the request failed.
+        """
+        concurrency = concurrency or self.pool_size
+        calls = (
+            (url, lambda url=url: self._request("GET", url, params=params))
+            for url in urls
+        )
+        yield from self._run_many(calls, concurrency)
+    
+    def post_many(self, items, concurrency=None):
+        """
+        POST many payloads concurrently over the pooled session.
+        
+        Args:
+            items: Iterable of (url, json_data) tuples
+            concurrency: Maximum number of parallel requests
+        
+        Yields (url, response) tuples in completion order; response is None
+        if the request failed.
+        """
+        concurrency = concurrency or self.pool_size
+        calls = (
+            (url, lambda url=url, json_data=json_data: self._request("POST", url, json=json_data))
+            for url, json_data in items
+        )
+        yield from self._run_many(calls, concurrency)
+    
+    def _fetch_page(self, url, params=None):
+        response = self._request("GET", url, params=params)
+        if response is None:
+            raise ConnectionError(f"No response from {url}")
+        if response.status_code != 200:
+            raise ConnectionError(f"Error fetching {url}: HTTP {response.status_code}")
+        return response
+    
+    def iter_pages(self, url, params=None, mode="auto", page_size=100, records_key=None,
+                   prefetch=2, max_pages=None, cursor_param="cursor",
+                   offset_param="offset", page_param="page", limit_param="limit"):
+        """
+        Yield the records of each page of a paginated API.
+        
+        Args:
+            url: URL of the first page
+            params: Query parameters sent with every page
+            mode: "auto" follows Link headers or next/cursor fields in the body,
+                "offset" and "page" step offset/page query parameters until an
+                empty page or the reported total
+            page_size: Value of `limit_param` in "offset" and "page" mode
+            records_key: Key holding the records in a JSON object response
+            prefetch: Number of pages fetched ahead of the consumer
+            max_pages: Stop after this many pages
+        
+        Linked pages ("auto") can only be prefetched one page ahead, because
+        the next URL is known only after the current page arrives.
+        """
+        if mode == "offset":
+            return self._iter_numbered_pages(url, params, offset_param, 0, page_size, page_size,
+                                             limit_param, records_key, prefetch, max_pages, offsets=True)
+        if mode == "page":
+            return self._iter_numbered_pages(url, params, page_param, 1, 1, page_size,
+                                             limit_param, records_key, prefetch, max_pages)
+        return self._iter_linked_pages(url, params, records_key, max_pages, cursor_param)
+    
+    def iter_records(self, url, **kwargs):
+        """Yield single records from all pages (see iter_pages for arguments)"""
+        for records in self.iter_pages(url, **kwargs):
+            yield from records
+    
+    def _iter_linked_pages(self, url, params, records_key, max_pages, cursor_param):
+        params = dict(params or {})
+        # Requests already made, so a next link or cursor that repeats ends the loop
+        seen = {request_key(url, params)}
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._fetch_page, url, params)
+            pages = 0
+            while future:
+                response = future.result()
+                data = response.json()
+                pages += 1
+                
+                # Request the next page before handing this one to the caller
+                future = None
+                if not max_pages or pages < max_pages:
+                    next_request = next_page_request(response, data, url, params, cursor_param)
+                    if next_request and request_key(*next_request) in seen:
+                        print(f"Pagination stopped: the API returned an already fetched page again ({next_request[0]})")
+                    elif next_request:
+                        seen.add(request_key(*next_request))
+                        future = executor.submit(self._fetch_page, *next_request)
+                
+                yield extract_records(data, records_key)
+    
+    def _iter_numbered_pages(self, url, params, param, start, step, page_size,
+                             limit_param, records_key, prefetch, max_pages, offsets=False):
+        params = dict(params or {})
+        params[limit_param] = page_size
+        prefetch = max(1, prefetch)
+        futures = deque()
+        submitted = 0
+        position = start
+        received = 0
+        
+        with ThreadPoolExecutor(max_workers=prefetch) as executor:
+            def submit():
+                nonlocal submitted, position
+                if max_pages and submitted >= max_pages:
+                    return
+                futures.append((position, executor.submit(self._fetch_page, url, {**params, param: position})))
+                submitted += 1
+                position += step
+            
+            def drop_pending():
+                nonlocal submitted
+                for _, future in futures:
+                    future.cancel()
+                submitted -= len(futures)
+                futures.clear()
+            
+            for _ in range(prefetch):
+                submit()
+            
+            while futures:
+                page_position, future = futures.popleft()
+                data = future.result().json()
+                records = extract_records(data, records_key)
+                received += len(records)
+                total = reported_total(data)
+                # A short page is not necessarily the last one: APIs often cap
+                # the page size below the requested one
+                # Once the step was adapted to the API's cap, a shorter page is the last one
+                capped = offsets and step < page_size and len(records) < step
+                if not records or capped or (total is not None and received >= total):
+                    # Last page - drop the requests for pages past the end
+                    drop_pending()
+                    if records:
+                        yield records
+                    return
+                if offsets and len(records) < step:
+                    # The API caps the page size: prefetched offsets assumed
+                    # full pages and would skip records
+                    drop_pending()
+                    step = len(records)
+                    position = page_position + step
+                while len(futures) < prefetch and not (max_pages and submitted >= max_pages):
+                    submit()
+                yield records
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
             
     def save_response(self, filename=None):
         
@@ -82,6 +298,60 @@ class APIClient:
     def get_last_response_info(self):
         """Zwraca informacje o ostatniej odpowiedzi"""
 
+def extract_records(data, records_key=None):
+    """Return the list of records from a page of API data"""
+    if isinstance(data, list):
+        return data
+    if not isinstance(data, dict):
+        return []
+    if records_key:
+        return data.get(records_key) or []
+    for key in RECORDS_KEYS:
+        if isinstance(data.get(key), list):
+            return data[key]
+    return []
+
+def reported_total(data):
+    """Total number of records reported by a page of API data, or None"""
+    if not isinstance(data, dict):
+        return None
+    containers = [data] + [data[k] for k in ("meta", "pagination", "paging") if isinstance(data.get(k), dict)]
+    for container in containers:
+        for key in TOTAL_KEYS:
+            value = container.get(key)
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+    return None
+
+def request_key(url, params=None):
+    """Hashable identity of a page request"""
+    return url, tuple(sorted((key, str(value)) for key, value in (params or {}).items()))
+
+def next_page_request(response, data, url, params, cursor_param="cursor"):
+    """
+    Work out the request for the page after `response`.
+    Returns (url, params) or None on the last page.
+    """
+    # RFC 5988 Link header, e.g. GitHub
+    next_link = response.links.get("next", {}).get("url")
+    if next_link:
+        return urljoin(response.url, next_link), None
+    
+    if not isinstance(data, dict):
+        return None
+    
+    containers = [data] + [data[k] for k in ("links", "meta", "pagination", "paging") if isinstance(data.get(k), dict)]
+    for container in containers:
+        for key in NEXT_KEYS:
+            value = container.get(key)
+            if not value or not isinstance(value, (str, int)):
+                continue
+            value = str(value)
+            if value.startswith(("http://", "https://", "/", "?")):
+                return urljoin(response.url, value), None
+            return url, {**params, cursor_param: value}
+    return None
+
 def fetch_items(url="https://api.przyklad.com/items"):
     response = requests.get(url)
     if response.status_code == 200:
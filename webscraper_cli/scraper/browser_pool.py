@@ -0,0 +1,204 @@
+# scraper/browser_pool.py
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from selenium.common.exceptions import WebDriverException
+from scraper.webscraper import WebScraper, create_driver, url_origin
+from scraper.resource_policy import ResourceStats
+
+
+class BrowserPool:
+    """
+    Pool of pre-launched headless Chrome sessions.
+
+    Sessions are started once and leased to callers, so a batch job pays
+    the browser startup cost only N times instead of once per page.
+    Cookies and storage are wiped between leases, and a session is
+    replaced after `max_page_loads` pages or when it crashes.
+    With lazy=True no browser is started until a lease needs one.
+    """
+
+    def __init__(self, size=2, config=None, max_page_loads=100, warm_url="about:blank", lazy=False):
+        self.size = size
+        self.config = config or {}
+        self.max_page_loads = max_page_loads
+        self.warm_url = warm_url
+
+        # LIFO: warm sessions are reused before a placeholder launches a new one
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Lease statistics
+        self.leases = 0
+        self.recycled = 0
+        self.crashes = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # Blocked/loaded request counters of all sessions, including recycled ones
+        self.resource_stats = ResourceStats()
+
+        # None is a slot whose browser is launched on the next acquire()
+        for _ in range(size):
+            self._idle.put(None if lazy else self._launch())
+
+    def _launch(self):
+        """Start a new browser session and warm it up"""
+        scraper = WebScraper(self.config, driver=create_driver(self.config))
+        scraper.resource_stats = self.resource_stats
+        scraper.driver.get(self.warm_url)
+        scraper.page_loads = 0
+        return scraper
+
+    def _is_alive(self, scraper):
+        """Check if the browser still responds to commands"""
+        try:
+            scraper.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _reset(self, scraper):
+        """Remove cookies and web storage left by the previous lease"""
+        driver = scraper.driver
+        try:
+            driver.execute_script("window.sessionStorage.clear();")
+        except WebDriverException:
+            # about:blank and some error pages have no storage
+            pass
+
+        # Storage is cleared per origin: every origin the session navigated
+        # to, plus the domains that set cookies (third-party frames)
+        origins = set(scraper.visited_origins)
+        origins.add(url_origin(driver.current_url))
+        try:
+            for cookie in driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]:
+                domain = cookie["domain"].lstrip(".")
+                origins.update((f"https://{domain}", f"http://{domain}"))
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            for origin in sorted(origins - {None}):
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        except AttributeError:
+            # Not a Chromium driver: only the current origin can be cleared
+            driver.delete_all_cookies()
+            driver.execute_script("window.localStorage.clear();")
+        scraper.visited_origins.clear()
+        driver.get(self.warm_url)
+        # Events of the previous lease would count as in-flight requests
+        if scraper.performance_log:
+            scraper.read_performance_log()
+
+    def _discard(self, scraper):
+        """Quit a session without raising if it is already dead"""
+        try:
+            scraper.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None) -> WebScraper:
+        """Take a session from the pool, waiting up to `timeout` seconds"""
+        if self._closed:
+            raise RuntimeError("BrowserPool is closed")
+
+        start = time.monotonic()
+        try:
+            scraper = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No browser session available after {timeout}s")
+        if scraper is None:
+            # Lazy or failed slot: launch now, keep the slot if it fails
+            try:
+                scraper = self._launch()
+            except Exception:
+                self._idle.put(None)
+                raise
+        waited = time.monotonic() - start
+
+        with self._lock:
+            self.leases += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+        scraper.lease_wait = waited
+        return scraper
+
+    def release(self, scraper, crashed=False):
+        """Return a session to the pool, recycling it if needed"""
+        if self._closed:
+            self._discard(scraper)
+            return
+
+        if not crashed and scraper.page_loads < self.max_page_loads:
+            try:
+                self._reset(scraper)
+                self._idle.put(scraper)
+                return
+            except WebDriverException:
+                crashed = True
+
+        if crashed or not self._is_alive(scraper):
+            with self._lock:
+                self.crashes += 1
+        with self._lock:
+            self.recycled += 1
+
+        self._discard(scraper)
+        try:
+            self._idle.put(self._launch())
+        except Exception as e:
+            # Keep the slot (relaunched on the next acquire) and do not hide
+            # the exception that made the caller release the session
+            print(f"Error relaunching browser session: {e}")
+            self._idle.put(None)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Lease a session for the duration of a `with` block.
+
+        Usage:
+            with pool.lease() as scraper:
+                scraper.navigate(url)
+        """
+        scraper = self.acquire(timeout)
+        crashed = False
+        try:
+            yield scraper
+        except WebDriverException:
+            crashed = not self._is_alive(scraper)
+            raise
+        finally:
+            self.release(scraper, crashed=crashed)
+
+    def stats(self) -> dict:
+        """Return lease and recycling statistics"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "leases": self.leases,
+                "recycled": self.recycled,
+                "crashes": self.crashes,
+                "avg_wait": self.total_wait / self.leases if self.leases else 0.0,
+                "max_wait": self.max_wait,
+                "resources": self.resource_stats.stats(),
+            }
+
+    def close(self):
+        """Quit all idle sessions; sessions still leased are quit on release"""
+        self._closed = True
+        while True:
+            try:
+                scraper = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if scraper is not None:
+                self._discard(scraper)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,12 +1,17 @@
-import requests, base64, time
+import base64, time
 from PIL import Image
-import pytesseract
 from io import BytesIO
 import os
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from scraper.captcha_service import CaptchaError, TWOCAPTCHA_URL, get_captcha_service
+from scraper.captcha_ocr import (
+    DEFAULT_TESSERACT_CONFIG, get_ocr_pool, get_solution_cache, image_hash, ocr_image, preprocessing_chain
+)
+from scraper.db import DB_PATH
 
 # Common CAPTCHA selectors and identifiers
 CAPTCHA_IDENTIFIERS = [
@@ -19,6 +24,33 @@ CAPTCHA_IDENTIFIERS = [
     {"by": By.XPATH, "value": "//img[contains(@alt,'captcha')]"}
 ]
 
+# CAPTCHA_IDENTIFIERS as (kind, query) pairs for DETECT_CAPTCHA_JS
+CAPTCHA_QUERIES = [
+    ["xpath", identifier["value"]] if identifier["by"] == By.XPATH
+    else ["css", f"[id='{identifier['value']}']" if identifier["by"] == By.ID else identifier["value"]]
+    for identifier in CAPTCHA_IDENTIFIERS
+]
+
+# Markup suggesting a CAPTCHA widget may still be rendering
+CAPTCHA_HINT_SELECTOR = (
+    "script[src*='captcha'], script[src*='recaptcha'], script[src*='hcaptcha'], "
+    "[class*='captcha' i], [id*='captcha' i]"
+)
+
+# Returns [first matching element, its outerHTML, hint flag] in one round trip
+DETECT_CAPTCHA_JS = """
+var queries = arguments[0];
+for (var i = 0; i < queries.length; i++) {
+    var element = queries[i][0] === 'xpath'
+        ? document.evaluate(queries[i][1], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(queries[i][1]);
+    if (element) {
+        return [element, element.outerHTML.slice(0, 2000), true];
+    }
+}
+return [null, null, document.querySelector(arguments[1]) !== null];
+"""
+
 # CAPTCHA input field selectors
 CAPTCHA_INPUT_SELECTORS = [
     {"by": By.ID, "value": "captcha-input"},
@@ -32,33 +64,47 @@ class CaptchaSolver:
         self.driver = driver
         self.config = config or {}
         self.api_key = self.config.get('2captcha_api_key', os.environ.get('CAPTCHA_API_KEY', ''))
-        self.temp_dir = self.config.get('temp_dir', 'temp_captcha')
         self.auto_solve = self.config.get('auto_solve', True)
+        # Seconds to wait for a 2CAPTCHA solution
+        self.solve_timeout = self.config.get('solve_timeout', 120)
+        
+        # OCR settings: preprocessing chain, Tesseract options and shared worker pool
+        self.ocr_chain = preprocessing_chain(self.config.get('ocr_preprocessing'))
+        self.tesseract_config = self.config.get('tesseract_config', DEFAULT_TESSERACT_CONFIG)
+        self.ocr_workers = self.config.get('ocr_workers', 2)
         
-        # Create temp directory if needed
-        os.makedirs(self.temp_dir, exist_ok=True)
+        # Solutions of already seen images (set 'solution_cache' to False to disable).
+        # Answers are only stored once the site accepted them.
+        cache_path = self.config.get('solution_cache', DB_PATH)
+        self.solution_cache = get_solution_cache(cache_path) if cache_path else None
+        self.cache_ocr_solutions = self.config.get('cache_ocr_solutions', True)
+        # Seconds to wait for the page to react to a submitted image CAPTCHA
+        self.verify_timeout = self.config.get('verify_timeout', 5)
         
     def detect_captcha(self, timeout=5):
         """
         Checks if current page contains a CAPTCHA.
         Returns the CAPTCHA element and its type if found, None otherwise.
+        
+        All CAPTCHA_IDENTIFIERS are checked in a single script call, so a
+        page without a CAPTCHA returns immediately. Only when the page loads
+        CAPTCHA scripts or has captcha-like markup without a matching widget
+        yet, detection keeps polling for up to `timeout` seconds.
         """
-        for identifier in CAPTCHA_IDENTIFIERS:
-            try:
-                element = WebDriverWait(self.driver, timeout).until(
-                    EC.presence_of_element_located((identifier["by"], identifier["value"]))
-                )
+        deadline = time.monotonic() + timeout
+        while True:
+            element, html, hint = self.driver.execute_script(DETECT_CAPTCHA_JS, CAPTCHA_QUERIES, CAPTCHA_HINT_SELECTOR)
+            if element is not None:
                 # Determine the type of CAPTCHA
-                html = element.get_attribute("outerHTML")
                 if "g-recaptcha" in html:
                     return {"element": element, "type": "recaptcha"}
                 elif "hcaptcha" in html:
                     return {"element": element, "type": "hcaptcha"}
                 else:
                     return {"element": element, "type": "image"}
-            except (TimeoutException, NoSuchElementException):
-                continue
-        return None
+            if not hint or time.monotonic() >= deadline:
+                return None
+            time.sleep(0.25)
         
     def find_captcha_input(self):
         """Find the input field for CAPTCHA solution."""
@@ -99,18 +145,29 @@ class CaptchaSolver:
         element = captcha_info["element"]
         
         solution = None
-        timestamp = int(time.time())
-        screenshot_path = f"{self.temp_dir}/captcha_{timestamp}.png"
+        # Where the image CAPTCHA answer came from: "cache", "ocr" or "2captcha"
+        source = None
         
         print(f"CAPTCHA detected! Type: {captcha_type}")
         
         if captcha_type == "image":
-            # Try OCR first for image captchas
-            solution = self.solve_captcha_ocr(element, screenshot_path)
+            # Screenshot of just the CAPTCHA element, kept in memory
+            png = element.screenshot_as_png
+            key = image_hash(Image.open(BytesIO(png)))
+            if self.solution_cache:
+                solution = self.solution_cache.get(key)
+                if solution:
+                    source = "cache"
+                    print(f"CAPTCHA image seen before, cached solution: {solution}")
+            if not solution:
+                # Try OCR first for image captchas
+                solution = self.solve_captcha_ocr(png)
+                source = "ocr"
             # If OCR fails or returns unlikely solution, try 2captcha
             if not solution or len(solution) < 3:
                 if self.api_key:
-                    solution = self.solve_captcha_2captcha(element, screenshot_path)
+                    solution = self.solve_captcha_2captcha(png)
+                    source = "2captcha"
                 else:
                     print("OCR solution failed and no 2CAPTCHA API key provided")
                     return False
@@ -144,7 +201,11 @@ class CaptchaSolver:
                 submit_button = self.find_submit_button()
                 if submit_button:
                     submit_button.click()
-                    return True
+                    accepted = self.accepted(element)
+                    self.update_solution_cache(key, solution, source, accepted)
+                    if not accepted:
+                        print(f"CAPTCHA solution rejected: {solution}")
+                    return accepted
             else:
                 print("Could not find CAPTCHA input field")
                 return False
@@ -164,122 +225,78 @@ class CaptchaSolver:
                 print("Could not find submit button")
                 return False
     
-    def solve_captcha_ocr(self, element, screenshot_path="captcha.png"):
-        """Solve image CAPTCHA using local OCR."""
+    def accepted(self, element):
+        """
+        Decide if the site accepted a submitted image CAPTCHA: the old image
+        has to go away (page reloaded or widget re-rendered) and no CAPTCHA
+        may be shown afterwards.
+        """
+        deadline = time.monotonic() + self.verify_timeout
+        while time.monotonic() < deadline:
+            try:
+                element.is_displayed()
+            except StaleElementReferenceException:
+                break
+            time.sleep(0.25)
+        else:
+            return False
+        return self.detect_captcha(timeout=0) is None
+
+    def update_solution_cache(self, key, solution, source, accepted):
+        """Store accepted answers, drop cached ones the site rejected"""
+        if not self.solution_cache:
+            return
+        if accepted and (source == "2captcha" or (source == "ocr" and self.cache_ocr_solutions)):
+            self.solution_cache.put(key, solution, source)
+        elif not accepted and source == "cache":
+            self.solution_cache.forget(key)
+
+    def solve_captcha_ocr(self, png):
+        """Solve image CAPTCHA (PNG bytes) using local OCR in the shared OCR pool."""
         try:
-            # Take screenshot of just the CAPTCHA element
-            element.screenshot(screenshot_path)
-            # Use Tesseract OCR to read text from image
-            text = pytesseract.image_to_string(Image.open(screenshot_path))
-            text = text.strip().replace(" ", "").replace("\n", "")
+            future = get_ocr_pool(self.ocr_workers).submit(ocr_image, png, self.ocr_chain, self.tesseract_config)
+            text = future.result()
             print(f"OCR detected text: {text}")
             return text
         except Exception as e:
             print(f"Error solving CAPTCHA with OCR: {e}")
             return None
 
-    def solve_captcha_2captcha(self, element, screenshot_path="captcha.png"):
-        """Solve image CAPTCHA using 2CAPTCHA service."""
+    @property
+    def service(self):
+        """2Captcha service shared by every solver with the same API key"""
+        return get_captcha_service(
+            self.api_key,
+            self.config.get('2captcha_url', TWOCAPTCHA_URL),
+            poll_interval=self.config.get('poll_interval', 5.0),
+            timeout=self.solve_timeout,
+        )
+
+    def _wait_for_solution(self, future, name):
+        """Block until a submitted task is solved; the shared poller does the polling"""
         try:
-            # Take screenshot of just the CAPTCHA element
-            element.screenshot(screenshot_path)
-            # Send CAPTCHA to 2CAPTCHA service
-            with open(screenshot_path, 'rb') as f:
-                response = requests.post(
-                    'https://2captcha.com/in.php',
-                    files={'file': f},
-                    data={'key': self.api_key}
-                )
-            if not response.text.startswith('OK|'):
-                print(f"Error sending CAPTCHA to 2CAPTCHA: {response.text}")
-                return None
-            # Format: OK|12345678
-            captcha_id = response.text.split('|')[1]
-            # Wait for solution
-            for _ in range(30):  # Timeout after 30 attempts (approx. 60 seconds)
-                time.sleep(2)
-                solution_response = requests.get(
-                    f'https://2captcha.com/res.php?key={self.api_key}&action=get&id={captcha_id}'
-                )
-                if solution_response.text.startswith('OK|'):
-                    solution = solution_response.text.split('|')[1]
-                    print(f"2CAPTCHA solution: {solution}")
-                    return solution
-                if solution_response.text != 'CAPCHA_NOT_READY':
-                    print(f"Error getting solution from 2CAPTCHA: {solution_response.text}")
-                    return None
-            print("Timeout waiting for 2CAPTCHA solution")
+            # Small margin so the service reports its own timeout first
+            solution = future.result(self.solve_timeout + 10)
+            print(f"{name} solution received")
+            return solution
+        except (CaptchaError, TimeoutError, FutureTimeoutError) as e:
+            print(e if str(e) else f"Timeout waiting for {name} solution")
             return None
         except Exception as e:
-            print(f"Error solving CAPTCHA with 2CAPTCHA: {e}")
+            print(f"Error solving {name}: {e}")
             return None
+
+    def solve_captcha_2captcha(self, png):
+        """Solve image CAPTCHA (PNG bytes) using 2CAPTCHA service."""
+        future = self.service.submit_image(png)
+        return self._wait_for_solution(future, "2CAPTCHA")
             
     def solve_recaptcha(self, site_key):
         """Solve Google reCAPTCHA using 2CAPTCHA service."""
-        try:
-            page_url = self.driver.current_url
-            # Send request to 2CAPTCHA
-            response = requests.post(
-                'https://2captcha.com/in.php',
-                data={
-                    'key': self.api_key,
-                    'method': 'userrecaptcha',
-                    'googlekey': site_key,
-                    'pageurl': page_url
-                }
-            )
-            if not response.text.startswith('OK|'):
-                print(f"Error sending reCAPTCHA to 2CAPTCHA: {response.text}")
-                return None
-            captcha_id = response.text.split('|')[1]
-            # Wait for solution
-            for _ in range(60):  # Timeout after 60 attempts (approx. 120 seconds)
-                time.sleep(2)
-                solution_response = requests.get(
-                    f'https://2captcha.com/res.php?key={self.api_key}&action=get&id={captcha_id}'
-                )
-                if solution_response.text.startswith('OK|'):
-                    return solution_response.text.split('|')[1]
-                if solution_response.text != 'CAPCHA_NOT_READY':
-                    print(f"Error getting reCAPTCHA solution: {solution_response.text}")
-                    return None
-            print("Timeout waiting for reCAPTCHA solution")
-            return None
-        except Exception as e:
-            print(f"Error solving reCAPTCHA: {e}")
-            return None
+        future = self.service.submit_recaptcha(site_key, self.driver.current_url)
+        return self._wait_for_solution(future, "reCAPTCHA")
             
     def solve_hcaptcha(self, site_key):
         """Solve hCaptcha using 2CAPTCHA service."""
-        try:
-            page_url = self.driver.current_url
-            # Send request to 2CAPTCHA
-            response = requests.post(
-                'https://2captcha.com/in.php',
-                data={
-                    'key': self.api_key,
-                    'method': 'hcaptcha',
-                    'sitekey': site_key,
-                    'pageurl': page_url
-                }
-            )
-            if not response.text.startswith('OK|'):
-                print(f"Error sending hCaptcha to 2CAPTCHA: {response.text}")
-                return None
-            captcha_id = response.text.split('|')[1]
-            # Wait for solution
-            for _ in range(60):
-                time.sleep(2)
-                solution_response = requests.get(
-                    f'https://2captcha.com/res.php?key={self.api_key}&action=get&id={captcha_id}'
-                )
-                if solution_response.text.startswith('OK|'):
-                    return solution_response.text.split('|')[1]
-                if solution_response.text != 'CAPCHA_NOT_READY':
-                    print(f"Error getting hCaptcha solution: {solution_response.text}")
-                    return None
-            print("Timeout waiting for hCaptcha solution")
-            return None
-        except Exception as e:
-            print(f"Error solving hCaptcha: {e}")
-            return None
+        future = self.service.submit_hcaptcha(site_key, self.driver.current_url)
+        return self._wait_for_solution(future, "hCaptcha")
@@ -0,0 +1,179 @@
+# scraper/captcha_ocr.py
+
+import sqlite3
+import hashlib
+import datetime
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageFilter, ImageOps
+from scraper.db import DB_PATH, SQLITE_PRAGMAS
+
+# Applied to CAPTCHA images before OCR unless config['ocr_preprocessing'] overrides it
+DEFAULT_PREPROCESSING = ["grayscale", "threshold", "denoise"]
+
+# Tesseract options: one line of text
+DEFAULT_TESSERACT_CONFIG = "--psm 7"
+
+
+def grayscale(image):
+    return image.convert("L")
+
+def threshold(image, level=140):
+    """Black text on white background; pixels darker than `level` become black"""
+    return image.convert("L").point(lambda value: 0 if value < level else 255, "L")
+
+def denoise(image, size=3):
+    """Median filter: removes speckles and thin noise lines"""
+    return image.filter(ImageFilter.MedianFilter(size))
+
+def upscale(image, factor=2):
+    """Tesseract reads small glyphs better when they are enlarged"""
+    return image.resize((image.width * factor, image.height * factor), Image.LANCZOS)
+
+def autocontrast(image, cutoff=2):
+    return ImageOps.autocontrast(image.convert("L"), cutoff=cutoff)
+
+PREPROCESSORS = {
+    "grayscale": grayscale,
+    "threshold": threshold,
+    "denoise": denoise,
+    "upscale": upscale,
+    "autocontrast": autocontrast,
+}
+
+
+def preprocessing_chain(steps=None):
+    """
+    Build the list of (function, kwargs) for a chain given as step names or
+    dicts with a "step" key and the step's arguments, e.g.
+    ["grayscale", {"step": "threshold", "level": 120}, "denoise"]
+    """
+    chain = []
+    for step in DEFAULT_PREPROCESSING if steps is None else steps:
+        kwargs = dict(step) if isinstance(step, dict) else {"step": step}
+        name = kwargs.pop("step")
+        if name not in PREPROCESSORS:
+            raise ValueError(f"Unknown preprocessing step: {name}. Available steps: {', '.join(PREPROCESSORS)}")
+        chain.append((PREPROCESSORS[name], kwargs))
+    return chain
+
+def preprocess(image, chain):
+    for function, kwargs in chain:
+        image = function(image, **kwargs)
+    return image
+
+
+def image_hash(image) -> str:
+    """
+    Exact fingerprint of an image's decoded pixels. Two CAPTCHAs that
+    differ in a single character differ in pixels, so only the very same
+    image (even if re-encoded) gets the same hash.
+    """
+    image = image.convert("RGB")
+    digest = hashlib.blake2b(f"{image.width}x{image.height}".encode("ascii"), digest_size=16)
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def ocr_image(png, chain, tesseract_config=DEFAULT_TESSERACT_CONFIG):
+    """Preprocess PNG bytes and read their text with Tesseract"""
+    # Imported here: pytesseract pulls in pandas, which slows down CLI startup
+    import pytesseract
+    image = preprocess(Image.open(BytesIO(png)), chain)
+    text = pytesseract.image_to_string(image, config=tesseract_config)
+    return text.strip().replace(" ", "").replace("\n", "")
+
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+def get_ocr_pool(workers=2):
+    """
+    Thread pool shared by all solvers for OCR. Tesseract runs as a
+    subprocess, so threads are enough to use several cores.
+    """
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="captcha-ocr")
+        return _ocr_pool
+
+
+# Solutions by exact image hash (the older captcha_solutions table matched
+# perceptual hashes, which confused CAPTCHAs one character apart, and is no longer read)
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS captcha_image_solutions (
+    image_hash TEXT PRIMARY KEY,
+    solution TEXT,
+    source TEXT,
+    hits INTEGER DEFAULT 0,
+    updated_at TEXT
+)
+'''
+
+
+class CaptchaSolutionCache:
+    """
+    Solutions of previously solved CAPTCHA images, looked up by exact
+    image hash. Sites often rotate through a small set of images, so
+    repeats can be answered without OCR or a paid 2Captcha task. Callers
+    should only put() answers the site accepted and forget() answers it
+    rejected.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        for name, value in SQLITE_PRAGMAS.items():
+            self.conn.execute(f"PRAGMA {name}={value}")
+
+        with self.conn:
+            self.conn.execute(SCHEMA)
+
+    def get(self, key):
+        """Return the stored solution for an image hash, or None"""
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT solution FROM captcha_image_solutions WHERE image_hash = ?", (key,)
+            ).fetchone()
+            if row:
+                self.conn.execute("UPDATE captcha_image_solutions SET hits = hits + 1 WHERE image_hash = ?", (key,))
+                self.hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, key, solution, source):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO captcha_image_solutions (image_hash, solution, source, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, solution, source, datetime.datetime.now().isoformat())
+            )
+
+    def forget(self, key):
+        """Drop a solution that turned out to be wrong"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM captcha_image_solutions WHERE image_hash = ?", (key,))
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_solution_caches = {}
+_solution_caches_lock = threading.Lock()
+
+def get_solution_cache(path=DB_PATH):
+    """Return the cache shared by all solvers using the same database"""
+    with _solution_caches_lock:
+        if path not in _solution_caches:
+            _solution_caches[path] = CaptchaSolutionCache(path)
+        return _solution_caches[path]
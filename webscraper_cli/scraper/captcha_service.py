@@ -0,0 +1,144 @@
+# scraper/captcha_service.py
+
+import time
+import threading
+import requests
+from concurrent.futures import Future
+
+TWOCAPTCHA_URL = "https://2captcha.com"
+
+
+class CaptchaError(Exception):
+    """2Captcha rejected a task or could not solve it"""
+
+
+class TwoCaptchaService:
+    """
+    Submits CAPTCHAs to 2Captcha and returns Futures for their solutions.
+
+    One background thread polls all outstanding task ids with a single
+    batched res.php?action=get&ids=... request, so waiting for many
+    solutions costs one request per poll interval, and the threads that
+    submitted them are free to do other work until they need the result.
+    """
+
+    def __init__(self, api_key, base_url=TWOCAPTCHA_URL, poll_interval=5.0, timeout=120.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        # task id -> (future, deadline)
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._thread.start()
+
+    def _submit(self, data, files=None):
+        future = Future()
+        try:
+            response = self.session.post(f"{self.base_url}/in.php", data={"key": self.api_key, **data}, files=files)
+            if not response.text.startswith("OK|"):
+                raise CaptchaError(f"Error sending CAPTCHA to 2CAPTCHA: {response.text}")
+        except Exception as e:
+            future.set_exception(e)
+            return future
+
+        # Format: OK|12345678
+        captcha_id = response.text.split("|", 1)[1]
+        with self._cond:
+            self._pending[captcha_id] = (future, time.monotonic() + self.timeout)
+            self._cond.notify()
+        return future
+
+    def submit_image(self, image_bytes):
+        """Submit an image CAPTCHA (PNG bytes); returns a Future with the text"""
+        return self._submit({}, files={"file": ("captcha.png", image_bytes, "image/png")})
+
+    def submit_recaptcha(self, site_key, page_url):
+        """Submit a reCAPTCHA; returns a Future with the g-recaptcha-response token"""
+        return self._submit({"method": "userrecaptcha", "googlekey": site_key, "pageurl": page_url})
+
+    def submit_hcaptcha(self, site_key, page_url):
+        """Submit an hCaptcha; returns a Future with the h-captcha-response token"""
+        return self._submit({"method": "hcaptcha", "sitekey": site_key, "pageurl": page_url})
+
+    def _poll_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    break
+            time.sleep(self.poll_interval)
+            self._poll()
+
+        with self._cond:
+            for future, _ in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+
+    def _poll(self):
+        """Fetch the state of every pending task in one request and resolve finished ones"""
+        with self._cond:
+            ids = list(self._pending)
+        if not ids:
+            return
+
+        try:
+            response = self.session.get(
+                f"{self.base_url}/res.php",
+                params={"key": self.api_key, "action": "get", "ids": ",".join(ids)}
+            )
+            results = response.text.split("|")
+        except requests.RequestException as e:
+            print(f"Error polling 2CAPTCHA: {e}")
+            results = []
+
+        if len(results) != len(ids):
+            # Account-level error (e.g. ERROR_WRONG_USER_KEY) fails every task
+            if results and results[0].startswith("ERROR"):
+                results = [results[0]] * len(ids)
+            else:
+                results = ["CAPCHA_NOT_READY"] * len(ids)
+
+        now = time.monotonic()
+        with self._cond:
+            for captcha_id, result in zip(ids, results):
+                future, deadline = self._pending[captcha_id]
+                if result == "CAPCHA_NOT_READY":
+                    if now < deadline:
+                        continue
+                    future.set_exception(TimeoutError(f"Timeout waiting for 2CAPTCHA solution of task {captcha_id}"))
+                elif result.startswith("ERROR"):
+                    future.set_exception(CaptchaError(f"Error getting solution from 2CAPTCHA: {result}"))
+                else:
+                    future.set_result(result)
+                del self._pending[captcha_id]
+
+    def pending(self):
+        """Number of tasks waiting for a solution"""
+        with self._cond:
+            return len(self._pending)
+
+    def close(self):
+        """Stop polling; unfinished futures are cancelled"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.session.close()
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_captcha_service(api_key, base_url=TWOCAPTCHA_URL, poll_interval=5.0, timeout=120.0):
+    """Return the service shared by all solvers using the same key and endpoint"""
+    with _services_lock:
+        key = (api_key, base_url)
+        if key not in _services:
+            _services[key] = TwoCaptchaService(api_key, base_url, poll_interval, timeout)
+        return _services[key]
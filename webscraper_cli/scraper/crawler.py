@@ -0,0 +1,103 @@
+# scraper/crawler.py
+
+import queue
+import threading
+from urllib.parse import urlparse
+
+# Marks the end of the URL stream / a finished worker
+_DONE = object()
+
+
+def read_urls(stream):
+    """Yield URLs from a file-like object, skipping blank lines and # comments"""
+    for line in stream:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+
+class HostLimiter:
+    """Limit the number of concurrent requests to a single host"""
+
+    def __init__(self, per_host=2):
+        self.per_host = per_host
+        self._active = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, host):
+        with self._cond:
+            while self._active.get(host, 0) >= self.per_host:
+                self._cond.wait()
+            self._active[host] = self._active.get(host, 0) + 1
+
+    def release(self, host):
+        with self._cond:
+            # Drop idle hosts so the dict does not grow with the URL list
+            if self._active[host] <= 1:
+                del self._active[host]
+            else:
+                self._active[host] -= 1
+            self._cond.notify_all()
+
+
+def crawl(urls, process, workers=4, per_host=2, max_in_flight=100):
+    """
+    Run `process` over many URLs with a fixed number of worker threads.
+
+    Args:
+        urls: Iterable of URLs (consumed lazily)
+        process: Callable(url) returning a result dict, e.g.
+            lambda url: process_dynamic_scrape(pool, url)
+        workers: Number of worker threads
+        per_host: Maximum concurrent pages per host
+        max_in_flight: Maximum number of URLs queued or being processed
+
+    Yields:
+        Result dicts in completion order
+    """
+    todo = queue.Queue(maxsize=max_in_flight)
+    results = queue.Queue(maxsize=max_in_flight)
+    limiter = HostLimiter(per_host)
+
+    def feed():
+        try:
+            for url in urls:
+                todo.put(url)
+        finally:
+            for _ in range(workers):
+                todo.put(_DONE)
+
+    def work():
+        try:
+            while True:
+                url = todo.get()
+                if url is _DONE:
+                    break
+                host = urlparse(url).netloc
+                limiter.acquire(host)
+                try:
+                    result = process(url)
+                except Exception as e:
+                    result = {
+                        "success": False,
+                        "url": url,
+                        "error": str(e),
+                        "message": f"Error processing {url}: {str(e)}"
+                    }
+                finally:
+                    limiter.release(host)
+                results.put(result)
+        finally:
+            results.put(_DONE)
+
+    threading.Thread(target=feed, daemon=True).start()
+    for _ in range(workers):
+        threading.Thread(target=work, daemon=True).start()
+
+    finished = 0
+    while finished < workers:
+        result = results.get()
+        if result is _DONE:
+            finished += 1
+        else:
+            yield result
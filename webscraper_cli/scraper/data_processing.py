@@ -1,45 +1,174 @@
 # scraper/data_processing.py
 import re
-from bs4 import BeautifulSoup
-from collections import Counter
-import pandas as pd
-from textblob import TextBlob
-import spacy
+import threading
+import lxml.html
+from lxml import etree
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 import datetime
+from scraper.extraction import Snapshot, first_texts
+from scraper.frontier import extract_links
 from scraper.db import save_to_mongodb
 
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
+# spaCy, TextBlob and pandas take seconds to import, so they are loaded on
+# first use instead of at import time (see get_nlp and warm_up)
+SPACY_MODEL = "en_core_web_sm"
 
-def clean_text(raw_html: str) -> str:
-    # 1. Remove HTML
-    soup = BeautifulSoup(raw_html, "html.parser")
-    text = soup.get_text(separator=" ")
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """Return the shared spaCy pipeline, loading it on first call"""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL)
+    return _nlp
+
+def ner_disabled_components(nlp):
+    """
+    Names of pipeline components that named entity recognition does not
+    need (parser, tagger, lemmatizer...). The shared tok2vec layer is kept
+    only if the NER component listens to it.
+    """
+    keep = {"ner", "entity_ruler"}
+    if "tok2vec" in nlp.pipe_names:
+        listeners = getattr(nlp.get_pipe("tok2vec"), "listening_components", [])
+        if "ner" in listeners:
+            keep.add("tok2vec")
+    return [name for name in nlp.pipe_names if name not in keep]
+
+def warm_up():
+    """Load the NLP stack ahead of time so the first page is not slowed down"""
+    get_nlp()
+    import textblob
+
+# Elements whose content is never visible text
+NON_TEXT_TAGS = ["script", "style", "noscript", "template", "svg", "canvas", "iframe", "object"]
+
+# Page chrome that repeats on every page and only adds noise to NLP.
+# <header> and <form> are kept: article titles live in <article><header>
+# and ASP.NET WebForms pages wrap the whole body in a <form>.
+BOILERPLATE_TAGS = ["nav", "footer", "aside", "button", "select"]
+
+# Runs of non-word characters (punctuation and whitespace) become a single space
+NON_WORD_RE = re.compile(r'\W+')
+
+_html_parser = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+
+def clean_text(raw_html: str, strip_boilerplate: bool = True) -> str:
+    if not raw_html or not raw_html.strip():
+        return ""
+    
+    # 1. Parse with lxml (encoded, so pages with an XML encoding declaration parse too)
+    try:
+        root = lxml.html.document_fromstring(raw_html.encode("utf-8", "replace"), parser=_html_parser)
+    except etree.ParserError:
+        # Nothing but comments or processing instructions
+        return ""
     
-    # 2. Remove special characters and normalize spaces
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'[^\w\s]', ' ', text)
+    # 2. Drop scripts, styles and (optionally) navigation/footer boilerplate
+    etree.strip_elements(root, *NON_TEXT_TAGS, with_tail=False)
+    if strip_boilerplate:
+        etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+    text = " ".join(root.itertext())
     
-    # 3. Trim
-    return text.strip().lower()
+    # 3. Remove special characters and normalize spaces in one pass, then trim
+    return NON_WORD_RE.sub(" ", text).strip().lower()
 
 def get_top_words(cleaned_text: str, top_n: int = 10):
     words = cleaned_text.split()
     return Counter(words).most_common(top_n)
 
 def analyze_sentiment(cleaned_text: str):
+    from textblob import TextBlob
     analysis = TextBlob(cleaned_text)
     return analysis
 
+def sentiment_scores(cleaned_text: str) -> dict:
+    sentiment = analyze_sentiment(cleaned_text)
+    return {
+        "polarity": sentiment.polarity,
+        "subjectivity": sentiment.subjectivity
+    }
+
 def extract_entities(cleaned_text: str):
-    doc = nlp(cleaned_text)
+    nlp = get_nlp()
+    doc = nlp(cleaned_text, disable=ner_disabled_components(nlp))
     return [ent for ent in doc.ents]
 
-def create_dataframe(data_list: list) -> pd.DataFrame:
+def build_processed(cleaned: str, sentiment: dict, entities) -> dict:
+    """Build the "processed" part of a stored document"""
+    return {
+        "cleaned_text": cleaned[:1000],  # Store a preview
+        "word_count": len(cleaned.split()),
+        "top_words": dict(get_top_words(cleaned)),
+        "sentiment": sentiment,
+        "entities": [{"text": ent.text, "label": ent.label_} for ent in entities]
+    }
+
+def process_documents(pages, batch_size=64, n_process=1, sentiment_workers=1):
+    """
+    Clean and analyze many HTML pages in batches.
+    
+    Named entities are extracted with nlp.pipe, running only the components
+    NER needs. Sentiment is computed on a process pool when
+    sentiment_workers > 1, in parallel with spaCy.
+    
+    Args:
+        pages: Iterable of raw HTML strings (consumed lazily)
+        batch_size: Number of texts per spaCy batch
+        n_process: Number of spaCy worker processes
+        sentiment_workers: Number of processes for TextBlob sentiment
+    
+    Yields:
+        Processed dicts (see build_processed) in the same order as pages
+    """
+    nlp = get_nlp()
+    disable = ner_disabled_components(nlp)
+    executor = ProcessPoolExecutor(sentiment_workers) if sentiment_workers > 1 else None
+    
+    # Texts handed to spaCy wait here with their sentiment until their doc comes back
+    pending = deque()
+    
+    def cleaned_texts():
+        for html in pages:
+            cleaned = clean_text(html) if html else ""
+            sentiment = executor.submit(sentiment_scores, cleaned) if executor else None
+            pending.append((cleaned, sentiment))
+            yield cleaned
+    
+    try:
+        for doc in nlp.pipe(cleaned_texts(), batch_size=batch_size, n_process=n_process, disable=disable):
+            cleaned, sentiment = pending.popleft()
+            sentiment = sentiment.result() if executor else sentiment_scores(cleaned)
+            yield build_processed(cleaned, sentiment, doc.ents)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+def create_dataframe(data_list: list) -> "pd.DataFrame":
+    import pandas as pd
     return pd.DataFrame(data_list)
 
-def process_and_save_data(url, html_content, text_elements=None):
+def process_and_save_data(url, html_content, text_elements=None, writer=None, fingerprints=None):
    
+    # Skip NLP and storage for pages seen before (ContentFingerprintCache)
+    cleaned = clean_text(html_content) if html_content else ""
+    if fingerprints is not None and html_content:
+        known = fingerprints.check(url, cleaned)
+        if known:
+            if known["status"] == "duplicate":
+                fingerprints.record(url, cleaned, known["mongodb_id"])
+            return {
+                "mongodb_id": known["mongodb_id"],
+                "document": None,
+                "saved": None,
+                "skipped": known["status"]
+            }
+    
     # Initialize the document to be stored
     document = {
         "url": url,
@@ -50,26 +179,11 @@ def process_and_save_data(url, html_content, text_elements=None):
     
     # Process HTML content if available
     if html_content:
-        cleaned = clean_text(html_content)
-        document["processed"]["cleaned_text"] = cleaned[:1000]  # Store a preview
-        document["processed"]["word_count"] = len(cleaned.split())
-        
-        # Extract top words
-        top_words = get_top_words(cleaned)
-        document["processed"]["top_words"] = dict(top_words)
-        
-        # Analyze sentiment
-        sentiment = analyze_sentiment(cleaned)
-        document["processed"]["sentiment"] = {
-            "polarity": sentiment.polarity,
-            "subjectivity": sentiment.subjectivity
-        }
-        
-        # Extract entities
-        entities = extract_entities(cleaned)
-        document["processed"]["entities"] = [
-            {"text": ent.text, "label": ent.label_} for ent in entities
-        ]
+        document["processed"] = build_processed(
+            cleaned,
+            sentiment_scores(cleaned),
+            extract_entities(cleaned)
+        )
     
     # Process individual text elements if available
     if text_elements:
@@ -80,43 +194,128 @@ def process_and_save_data(url, html_content, text_elements=None):
                 "length": len(text)
             }
     
-    # Save to MongoDB
-    result = save_to_mongodb(document)
+    # Save to MongoDB (buffered when a MongoBulkWriter is given: `saved`
+    # is then a Future that tells whether the insert succeeded)
+    saved = None
+    if writer is not None:
+        saved = writer.add(document)
+        result = document["_id"]
+    else:
+        result = save_to_mongodb(document)
+    
+    if fingerprints is not None and html_content:
+        if saved is None:
+            fingerprints.record(url, cleaned, result)
+        else:
+            # Only a stored page may be skipped as unchanged next time
+            def record_if_saved(future):
+                if future.exception() is None:
+                    fingerprints.record(url, cleaned, result)
+            saved.add_done_callback(record_if_saved)
     
     return {
         "mongodb_id": str(result),
-        "document": document
+        "document": document,
+        "saved": saved,
+        "skipped": None
     }
 
-def process_dynamic_scrape(scraper, url):
-   
+def page_record(document, engine="browser"):
+    """ResultStore record of a processed page (same fields as the interactive 'save db')"""
+    text_elements = document.get("text_elements", {})
+    return {
+        "url": document["url"],
+        "timestamp": document["timestamp"].isoformat(),
+        "title": text_elements.get("title", {}).get("text", ""),
+        "html_length": document["raw_html_length"],
+        "engine": engine,
+        "mongodb_id": str(document.get("_id", "")),
+        "texts": {selector: element["text"] for selector, element in text_elements.items()},
+        "processed": document["processed"],
+    }
+
+def scrape_message(url, result):
+    if result["skipped"] == "unchanged":
+        return f"Data for {url} unchanged since last scrape, skipped"
+    if result["skipped"] == "duplicate":
+        return f"Data for {url} duplicates an already saved page, skipped"
+    return f"Data for {url} processed and saved to MongoDB"
+
+def render_snapshot(scraper, url):
+    """Load a page in the browser and capture its rendered HTML"""
+    # Lease a warm browser session when given a BrowserPool; it goes back to
+    # the pool as soon as the page is captured, before any processing
+    if hasattr(scraper, "lease"):
+        with scraper.lease() as session:
+            return render_snapshot(session, url)
+    scraper.navigate(url)
+    return scraper.snapshot()
+
+def process_dynamic_scrape(scraper, url, writer=None, fingerprints=None, links=False):
+    """
+    Render a page in the browser, extract its text and process it.
+    With links=True the result also has the page's "links" (see frontier.extract_links).
+    """
     try:
-        # Navigate to URL
-        scraper.navigate(url)
+        # Navigate to URL and capture the rendered page
+        snapshot = render_snapshot(scraper, url)
         
-        # Get HTML content
-        html_content = scraper.get_html()
+        # Extract common text elements from the snapshot, without the browser
+        text_elements = {"title": snapshot.title, **first_texts(snapshot.extract_many(["body", "h1", "p"]))}
         
-        # Get page title
-        title = scraper.driver.title
+        # Process and save to MongoDB
+        result = process_and_save_data(url, snapshot.html, text_elements, writer, fingerprints)
+        
+        output = {
+            "success": True,
+            "url": url,
+            "mongodb_id": result["mongodb_id"],
+            "skipped": result["skipped"],
+            "document": result["document"],
+            "saved": result["saved"],
+            "message": scrape_message(url, result)
+        }
+        if links:
+            output["links"] = extract_links(snapshot)
+        return output
         
-        # Extract common text elements
-        text_elements = {
-            "title": title,
-            "body": scraper.get_text("body") if scraper.element_exists("body") else "",
-            "h1": scraper.get_text("h1") if scraper.element_exists("h1") else "",
-            "p": scraper.get_text("p") if scraper.element_exists("p") else ""
+    except Exception as e:
+        return {
+            "success": False,
+            "url": url,
+            "error": str(e),
+            "message": f"Error processing {url}: {str(e)}"
         }
+
+def process_static_scrape(fetcher, url, writer=None, fingerprints=None, links=False):
+    """
+    Same pipeline as process_dynamic_scrape, but the page is fetched with
+    a Fetcher (plain HTTP first, browser only if the page needs JavaScript)
+    """
+    try:
+        page = fetcher.fetch(url)
+        html_content = page["html"]
+        
+        # Extract common text elements from the fetched HTML
+        snapshot = Snapshot(html_content, page.get("final_url", url))
+        text_elements = {"title": page["title"], **first_texts(snapshot.extract_many(["body", "h1", "p"]))}
         
         # Process and save to MongoDB
-        result = process_and_save_data(url, html_content, text_elements)
+        result = process_and_save_data(url, html_content, text_elements, writer, fingerprints)
         
-        return {
+        output = {
             "success": True,
             "url": url,
+            "engine": page["engine"],
             "mongodb_id": result["mongodb_id"],
-            "message": f"Data for {url} processed and saved to MongoDB"
+            "skipped": result["skipped"],
+            "document": result["document"],
+            "saved": result["saved"],
+            "message": scrape_message(url, result)
         }
+        if links:
+            output["links"] = extract_links(snapshot)
+        return output
         
     except Exception as e:
         return {
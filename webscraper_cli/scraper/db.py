@@ -3,8 +3,13 @@
 import sqlite3
 import json
 import os
+import queue
+import threading
+import time
 import datetime
+from concurrent.futures import Future
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from bson.objectid import ObjectId
 
 # Ensure database directory exists
@@ -17,62 +22,298 @@ MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
 MONGO_DB = os.environ.get('MONGO_DB', 'webscraper')
 MONGO_COLLECTION = os.environ.get('MONGO_COLLECTION', 'scraped_data')
 
+# SQLite settings for the result store: WAL lets readers work while a
+# crawl is writing, NORMAL sync is safe with WAL and avoids an fsync per commit
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -64000,  # 64 MB
+    "mmap_size": 268435456,  # 256 MB
+    "busy_timeout": 5000,
+}
+
+# Marks the end of the BatchWriter queue
+_STOP = object()
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scraped_results (
+    id INTEGER PRIMARY KEY,
+    url TEXT,
+    timestamp TEXT,
+    title TEXT,
+    data TEXT,
+    created_at TEXT
+)
+'''
+
+# Fields inside the JSON `data` column that get an expression index.
+# Queries must use exactly these expressions for SQLite to pick the index.
+JSON_INDEXED_FIELDS = {
+    "html_length": "json_extract(data, '$.html_length')",
+    "engine": "json_extract(data, '$.engine')",
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_results_url_timestamp ON scraped_results (url, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_results_timestamp ON scraped_results (timestamp)",
+    # LIKE is case-insensitive, so only a NOCASE index can serve title filters
+    "CREATE INDEX IF NOT EXISTS idx_results_title_nocase ON scraped_results (title COLLATE NOCASE)",
+    # Replaced or unused indexes created by earlier versions
+    "DROP INDEX IF EXISTS idx_results_title",
+    "DROP INDEX IF EXISTS idx_results_success",
+] + [
+    f"CREATE INDEX IF NOT EXISTS idx_results_{name} ON scraped_results ({expression})"
+    for name, expression in JSON_INDEXED_FIELDS.items()
+]
+
+
+def result_row(data: dict, now=None):
+    """Convert a result dict to a scraped_results row"""
+    now = now or datetime.datetime.now().isoformat()
+    return (
+        data.get('url', ''),
+        data.get('timestamp', now),
+        data.get('title', ''),
+        json.dumps(data, ensure_ascii=False, default=str),
+        now
+    )
+
+
+class ResultStore:
+    """
+    SQLite store for scraped results that keeps one connection open.
+    The connection can be shared between threads; writes are serialized.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        
+        for name, value in SQLITE_PRAGMAS.items():
+            self.conn.execute(f"PRAGMA {name}={value}")
+        
+        with self.conn:
+            self.conn.execute(SCHEMA)
+            for index in INDEXES:
+                self.conn.execute(index)
+
+    def save(self, data: dict):
+        """Save a single result, returns its row id"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO scraped_results (url, timestamp, title, data, created_at) VALUES (?, ?, ?, ?, ?)',
+                result_row(data)
+            )
+            return cursor.lastrowid
+
+    def save_many(self, items):
+        """Save many results in a single transaction, returns number of rows"""
+        now = datetime.datetime.now().isoformat()
+        rows = [result_row(item, now) for item in items]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT INTO scraped_results (url, timestamp, title, data, created_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+        return len(rows)
+
+    def _where(self, url=None, since=None, until=None, title=None, **fields):
+        """Build a WHERE clause and its parameters from query filters"""
+        clauses = []
+        params = []
+        if url is not None:
+            clauses.append("url = ?")
+            params.append(url)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since.isoformat() if isinstance(since, datetime.datetime) else since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until.isoformat() if isinstance(until, datetime.datetime) else until)
+        if title is not None:
+            clauses.append("title LIKE ?")
+            params.append(title)
+        for name, value in fields.items():
+            if name in JSON_INDEXED_FIELDS:
+                clauses.append(f"{JSON_INDEXED_FIELDS[name]} = ?")
+            else:
+                clauses.append("json_extract(data, ?) = ?")
+                params.append(f"$.{name}")
+            params.append(value)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+
+    def iter_results(self, url=None, since=None, until=None, title=None, limit=None,
+                     newest_first=True, batch_size=500, **fields):
+        """
+        Yield stored results matching the filters, reading rows in batches.
+        
+        Args:
+            url: Exact URL
+            since / until: Time range on `timestamp` (ISO string or datetime)
+            title: SQL LIKE pattern for the title
+            limit: Maximum number of results
+            newest_first: Order by timestamp descending
+            **fields: Equality filters on fields inside the JSON data,
+                e.g. html_length=0 or engine="browser"
+        
+        Yields:
+            Stored result dicts with the row id added under "id"
+        """
+        where, params = self._where(url, since, until, title, **fields)
+        sql = f"SELECT id, data FROM scraped_results{where} ORDER BY timestamp {'DESC' if newest_first else 'ASC'}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        cursor = self.conn.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row_id, data in rows:
+                    result = json.loads(data)
+                    result["id"] = row_id
+                    yield result
+        finally:
+            cursor.close()
+
+    def latest(self, url):
+        """Return the most recent result for a URL, or None"""
+        return next(self.iter_results(url=url, limit=1), None)
+
+    def count(self, **filters):
+        """Count stored results matching the same filters as iter_results"""
+        where, params = self._where(**filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM scraped_results{where}", params).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class BatchWriter:
+    """
+    Collects results from many threads (e.g. crawl workers) and writes them
+    to a ResultStore in the background, in batches of `batch_size` rows or
+    at least every `interval` seconds.
+    """
+
+    def __init__(self, store, batch_size=500, interval=1.0):
+        self.store = store
+        self.batch_size = batch_size
+        self.interval = interval
+        self.written = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, data: dict):
+        self._queue.put(data)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.interval
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                if item is _STOP:
+                    running = False
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or not running):
+                try:
+                    self.written += self.store.save_many(batch)
+                except Exception as e:
+                    print(f"Error writing {len(batch)} results to database: {e}")
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.interval
+
+    def close(self):
+        """Write remaining results and stop the background thread"""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+def get_result_store():
+    """Return the shared ResultStore, opening it on first use"""
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore(DB_PATH)
+        return _result_store
+
 def init_db():
     """Initialize database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS scraped_results (
-        id INTEGER PRIMARY KEY,
-        url TEXT,
-        timestamp TEXT,
-        title TEXT,
-        data TEXT,
-        created_at TEXT
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    get_result_store()
 
 def save_result(data: dict):
     """Save scraped result to database"""
-    init_db()
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    now = datetime.datetime.now().isoformat()
-    
-    # Extract common fields
-    url = data.get('url', '')
-    timestamp = data.get('timestamp', now)
-    title = data.get('title', '')
-    
-    # Convert entire data object to JSON string
-    data_json = json.dumps(data, ensure_ascii=False)
-    
-    cursor.execute(
-        'INSERT INTO scraped_results (url, timestamp, title, data, created_at) VALUES (?, ?, ?, ?, ?)',
-        (url, timestamp, title, data_json, now)
-    )
+    return get_result_store().save(data)
+
+_mongo_client = None
+_mongo_client_lock = threading.Lock()
+
+def get_mongodb_client():
+    """
+    Get the shared MongoDB client. The client is created and pinged on
+    first use; later calls reuse its connection pool.
+    """
+    global _mongo_client
+    with _mongo_client_lock:
+        if _mongo_client is not None:
+            return _mongo_client
+        try:
+            client = MongoClient(MONGO_URI)
+            # Ping the server to check connection
+            client.admin.command('ping')
+            _mongo_client = client
+            return client
+        except Exception as e:
+            print(f"Error connecting to MongoDB: {e}")
+            return None
+
+def close_mongodb_client():
+    """Close the shared MongoDB client (e.g. at program exit)"""
+    global _mongo_client
+    with _mongo_client_lock:
+        if _mongo_client is not None:
+            _mongo_client.close()
+            _mongo_client = None
+
+def get_mongodb_collection():
+    """Get the scraped data collection, raises ConnectionError if MongoDB is unavailable"""
+    client = get_mongodb_client()
     
-    conn.commit()
-    conn.close()
+    if not client:
+        raise ConnectionError("Could not connect to MongoDB")
     
-    return cursor.lastrowid
+    return client[MONGO_DB][MONGO_COLLECTION]
 
-def get_mongodb_client():
-    """Get MongoDB client connection"""
-    try:
-        client = MongoClient(MONGO_URI)
-        # Ping the server to check connection
-        client.admin.command('ping')
-        return client
-    except Exception as e:
-        print(f"Error connecting to MongoDB: {e}")
-        return None
+def add_metadata(document):
+    """Add creation metadata to a document before it is stored"""
+    if "metadata" not in document:
+        document["metadata"] = {}
+    
+    document["metadata"]["created_at"] = datetime.datetime.now()
+    document["metadata"]["source"] = "web_scraper_cli"
+    return document
 
 def save_to_mongodb(document):
     """
@@ -84,21 +325,11 @@ def save_to_mongodb(document):
     Returns:
         MongoDB ObjectId of inserted document
     """
-    client = get_mongodb_client()
-    
-    if not client:
-        raise ConnectionError("Could not connect to MongoDB")
+    collection = get_mongodb_collection()
     
     try:
-        db = client[MONGO_DB]
-        collection = db[MONGO_COLLECTION]
-        
         # Add metadata
-        if "metadata" not in document:
-            document["metadata"] = {}
-        
-        document["metadata"]["created_at"] = datetime.datetime.now()
-        document["metadata"]["source"] = "web_scraper_cli"
+        add_metadata(document)
         
         # Insert document
         result = collection.insert_one(document)
@@ -108,9 +339,6 @@ def save_to_mongodb(document):
     
     except Exception as e:
         raise Exception(f"Error saving to MongoDB: {e}")
-    
-    finally:
-        client.close()
 
 def get_from_mongodb(query=None, limit=10):
     """
@@ -148,9 +376,6 @@ def get_from_mongodb(query=None, limit=10):
     except Exception as e:
         print(f"Error retrieving from MongoDB: {e}")
         return []
-    
-    finally:
-        client.close()
 
 def delete_from_mongodb(document_id):
     """
@@ -181,6 +406,89 @@ def delete_from_mongodb(document_id):
     except Exception as e:
         print(f"Error deleting from MongoDB: {e}")
         return False
-    
-    finally:
-        client.close()
+
+
+class MongoBulkWriter:
+    """
+    Buffers documents and inserts them with insert_many(ordered=False)
+    when `batch_size` documents are waiting or `interval` seconds have
+    passed since the oldest one was added. Safe to share between threads.
+    """
+
+    def __init__(self, batch_size=500, interval=2.0):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.inserted = 0
+        self.errors = 0
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, document):
+        """
+        Queue a document for insertion. Its ObjectId is assigned here, so
+        callers can refer to it right away; the returned Future resolves
+        to that ObjectId once the document is inserted, or fails with the
+        insert error.
+        """
+        document.setdefault("_id", ObjectId())
+        add_metadata(document)
+        future = Future()
+        with self._lock:
+            self._buffer.append((document, future))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+        return future
+
+    def flush(self):
+        """Insert all buffered documents and resolve their futures"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._oldest = None
+        if not batch:
+            return
+        # Index in the batch -> error of the documents that were not inserted
+        errors = {}
+        try:
+            get_mongodb_collection().insert_many([document for document, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            # With ordered=False the rest of the batch is still inserted
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = Exception(f"Error saving to MongoDB: {error.get('errmsg', error)}")
+            print(f"Error saving {len(errors)} documents to MongoDB: {e}")
+        except Exception as e:
+            errors = {i: Exception(f"Error saving to MongoDB: {e}") for i in range(len(batch))}
+            print(f"Error saving {len(batch)} documents to MongoDB: {e}")
+        with self._lock:
+            self.inserted += len(batch) - len(errors)
+            self.errors += len(errors)
+        for i, (document, future) in enumerate(batch):
+            if i in errors:
+                future.set_exception(errors[i])
+            else:
+                future.set_result(document["_id"])
+
+    def _run(self):
+        while not self._stop.wait(min(self.interval, 0.5)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.interval
+            if due:
+                self.flush()
+
+    def close(self):
+        """Flush remaining documents and stop the background thread"""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
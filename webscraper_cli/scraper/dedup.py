@@ -0,0 +1,147 @@
+# scraper/dedup.py
+
+import sqlite3
+import hashlib
+import threading
+import datetime
+from scraper.db import DB_PATH, SQLITE_PRAGMAS
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS page_fingerprints (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT,
+    simhash INTEGER,
+    band0 INTEGER,
+    band1 INTEGER,
+    band2 INTEGER,
+    band3 INTEGER,
+    mongodb_id TEXT,
+    updated_at TEXT
+)
+'''
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_fingerprints_hash ON page_fingerprints (content_hash)",
+] + [
+    f"CREATE INDEX IF NOT EXISTS idx_fingerprints_band{i} ON page_fingerprints (band{i})"
+    for i in range(4)
+]
+
+# Number of words per shingle used for SimHash
+SHINGLE_SIZE = 3
+
+
+def content_hash(cleaned_text: str) -> str:
+    """Exact fingerprint of cleaned page text"""
+    return hashlib.blake2b(cleaned_text.encode("utf-8"), digest_size=16).hexdigest()
+
+def simhash(cleaned_text: str) -> int:
+    """
+    64-bit SimHash of the word shingles of a text. Pages that differ only
+    in a few words (dates, counters, ads) get hashes a few bits apart.
+    """
+    words = cleaned_text.split()
+    if not words:
+        return 0
+    shingles = (" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1)))
+    # Bit strings of the shingle hashes; each column is voted on by all shingles
+    bits = [
+        format(int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for shingle in shingles
+    ]
+    result = 0
+    for column in zip(*bits):
+        result = result << 1 | (column.count("1") * 2 > len(bits))
+    return result
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _signed(value: int) -> int:
+    """Store unsigned 64-bit values in SQLite's signed INTEGER"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def _bands(value: int):
+    """Split a 64-bit hash into four 16-bit bands"""
+    return [value >> (16 * i) & 0xFFFF for i in range(4)]
+
+
+class ContentFingerprintCache:
+    """
+    Remembers a fingerprint of the cleaned text of every processed page so
+    unchanged pages can skip NLP processing and storage on a recrawl.
+
+    With collapse_duplicates=True, a page whose text matches another URL
+    exactly, or within `max_distance` SimHash bits, is also skipped
+    (mirrors, print versions, tracking-parameter variants). Near-duplicate
+    candidates are found through four 16-bit SimHash bands; any two hashes
+    within 3 bits of each other share at least one band.
+    """
+
+    def __init__(self, path=DB_PATH, collapse_duplicates=False, max_distance=3):
+        self.collapse_duplicates = collapse_duplicates
+        self.max_distance = max_distance
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        for name, value in SQLITE_PRAGMAS.items():
+            self.conn.execute(f"PRAGMA {name}={value}")
+
+        with self.conn:
+            self.conn.execute(SCHEMA)
+            for index in INDEXES:
+                self.conn.execute(index)
+
+    def check(self, url, cleaned_text):
+        """
+        Look up a page before processing it.
+
+        Returns:
+            None if the page has to be processed, otherwise a dict with
+            "status" ("unchanged" or "duplicate"), the URL it matched and
+            the mongodb_id stored for it
+        """
+        digest = content_hash(cleaned_text)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT content_hash, mongodb_id FROM page_fingerprints WHERE url = ?", (url,)
+            ).fetchone()
+            if row and row[0] == digest:
+                return {"status": "unchanged", "url": url, "mongodb_id": row[1]}
+
+            if not self.collapse_duplicates:
+                return None
+
+            row = self.conn.execute(
+                "SELECT url, mongodb_id FROM page_fingerprints WHERE content_hash = ? AND url != ? LIMIT 1",
+                (digest, url)
+            ).fetchone()
+            if row:
+                return {"status": "duplicate", "url": row[0], "mongodb_id": row[1]}
+
+            value = simhash(cleaned_text)
+            candidates = self.conn.execute(
+                "SELECT url, simhash, mongodb_id FROM page_fingerprints "
+                "WHERE (band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?) AND url != ?",
+                (*_bands(value), url)
+            )
+            for other_url, other_hash, mongodb_id in candidates:
+                if hamming_distance(value, other_hash % (1 << 64)) <= self.max_distance:
+                    return {"status": "duplicate", "url": other_url, "mongodb_id": mongodb_id}
+        return None
+
+    def record(self, url, cleaned_text, mongodb_id=None):
+        """Store the fingerprint of a processed page"""
+        value = simhash(cleaned_text)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO page_fingerprints "
+                "(url, content_hash, simhash, band0, band1, band2, band3, mongodb_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, content_hash(cleaned_text), _signed(value), *_bands(value),
+                 str(mongodb_id) if mongodb_id else None, datetime.datetime.now().isoformat())
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -1,35 +1,400 @@
 # scraper/exporter.py
 import csv
 import json
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+import pickle
+import datetime
+import tempfile
+from xml.sax.saxutils import XMLGenerator
+
+# Parquet and Arrow export need pyarrow (optional dependency). It is
+# imported on first use by load_pyarrow() to keep CLI startup fast.
+pa = pq = None
+
+def load_pyarrow():
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet/Arrow export requires pyarrow: pip install pyarrow")
+        pa, pq = pyarrow, pyarrow.parquet
+
+
+class RecordWriter:
+    """
+    Base class for streaming writers: records are written one at a time,
+    so memory use does not depend on the size of the export.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.count = 0
+        self._file = open(filename, 'w', newline='', encoding='utf-8')
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def write_all(self, records):
+        """Write every record from an iterable; returns total records written"""
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CSVWriter(RecordWriter):
+    """
+    Write records to CSV one row at a time; header is taken from the first
+    record. A key missing from the header raises ValueError, unless
+    drop_extra=True, which leaves such keys out and reports them once.
+    """
+
+    def __init__(self, filename="results.csv", fieldnames=None, drop_extra=False):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.drop_extra = drop_extra
+        self.dropped = set()
+        self.count = 0
+        # File is created on the first record, so an empty export writes nothing
+        self._file = None
+        self._writer = None
+
+    def write(self, record):
+        if self._writer is None:
+            self.fieldnames = self.fieldnames or list(record.keys())
+            self._file = open(self.filename, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames,
+                                          extrasaction='ignore' if self.drop_extra else 'raise')
+            self._writer.writeheader()
+        if self.drop_extra:
+            extra = record.keys() - set(self.fieldnames) - self.dropped
+            if extra:
+                print(f"CSV export: dropping columns missing from the header: {', '.join(sorted(map(str, extra)))}")
+                self.dropped |= extra
+        self._writer.writerow(record)
+        self.count += 1
+
+
+class JSONLinesWriter(RecordWriter):
+    """Write records as JSON Lines (one JSON object per line)"""
+
+    def __init__(self, filename="results.jsonl"):
+        super().__init__(filename)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+
+
+class JSONArrayWriter(RecordWriter):
+    """Write records as a JSON array without building the list in memory"""
+
+    def __init__(self, filename="results.json", indent=4):
+        super().__init__(filename)
+        self.indent = indent
+        self._file.write("[")
+
+    def write(self, record):
+        item = json.dumps(record, indent=self.indent, ensure_ascii=False)
+        if self.indent:
+            pad = " " * self.indent
+            item = pad + item.replace("\n", "\n" + pad)
+        self._file.write(",\n" if self.count else "\n")
+        self._file.write(item)
+        self.count += 1
+
+    def close(self):
+        if self._file:
+            self._file.write("\n]" if self.count else "]")
+            self._file.close()
+            self._file = None
+
+
+class XMLWriter(RecordWriter):
+    """Write records as <item> elements of a <data> document, one at a time"""
+
+    def __init__(self, filename="results.xml", indent="  "):
+        super().__init__(filename)
+        self.indent = indent
+        self._xml = XMLGenerator(self._file, encoding='utf-8', short_empty_elements=True)
+        self._xml.startDocument()
+        self._xml.startElement("data", {})
+
+    def write(self, record):
+        self._xml.ignorableWhitespace("\n" + self.indent)
+        self._xml.startElement("item", {})
+        for key, value in record.items():
+            self._xml.ignorableWhitespace("\n" + self.indent * 2)
+            self._xml.startElement(key, {})
+            self._xml.characters(str(value))
+            self._xml.endElement(key)
+        self._xml.ignorableWhitespace("\n" + self.indent)
+        self._xml.endElement("item")
+        self.count += 1
+
+    def close(self):
+        if self._file:
+            self._xml.ignorableWhitespace("\n")
+            self._xml.endElement("data")
+            self._xml.endDocument()
+            self._file.write("\n")
+            self._file.close()
+            self._file = None
+
+
+def infer_arrow_type(values):
+    """
+    Infer an Arrow type from sample Python values (None is ignored).
+    Dicts whose values all share one scalar type (like `texts`) become
+    map<string, type> columns, other dicts become structs.
+    """
+    values = [v for v in values if v is not None]
+    if not values:
+        # Unknown until a later batch has values (see merge_arrow_types)
+        return pa.null()
+    if all(isinstance(v, bool) for v in values):
+        return pa.bool_()
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return pa.int64()
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return pa.float64()
+    if all(isinstance(v, datetime.datetime) for v in values):
+        return pa.timestamp("us")
+    if all(isinstance(v, (list, tuple)) for v in values):
+        return pa.list_(infer_arrow_type([item for v in values for item in v]))
+    if all(isinstance(v, dict) for v in values):
+        nested = [item for v in values for item in v.values()]
+        if not any(isinstance(item, (dict, list, tuple)) for item in nested):
+            return pa.map_(pa.string(), infer_arrow_type(nested))
+        keys = list(dict.fromkeys(key for v in values for key in v))
+        return pa.struct([
+            pa.field(str(key), infer_arrow_type([v.get(key) for v in values])) for key in keys
+        ])
+    # Mixed or unknown types are stored as text
+    return pa.string()
+
+def infer_arrow_schema(records):
+    """Infer an Arrow schema from a batch of records"""
+    load_pyarrow()
+    keys = list(dict.fromkeys(key for record in records for key in record))
+    return pa.schema([
+        pa.field(str(key), infer_arrow_type([record.get(key) for record in records])) for key in keys
+    ])
+
+def merge_arrow_types(a, b):
+    """
+    Smallest type both `a` and `b` values fit in, used to widen the schema
+    when a later batch has different types (int and float become float,
+    structs get the union of their fields, anything else becomes text;
+    dicts and lists in a text column are written as JSON).
+    """
+    if a == b:
+        return a
+    if pa.types.is_null(a):
+        return b
+    if pa.types.is_null(b):
+        return a
+    numeric = (pa.int64(), pa.float64())
+    if a in numeric and b in numeric:
+        return pa.float64()
+    if pa.types.is_list(a) and pa.types.is_list(b):
+        return pa.list_(merge_arrow_types(a.value_type, b.value_type))
+    if pa.types.is_map(a) and pa.types.is_map(b):
+        item_type = merge_arrow_types(a.item_type, b.item_type)
+        return pa.map_(pa.string(), item_type)
+    if pa.types.is_struct(a) and pa.types.is_struct(b):
+        fields = {field.name: field.type for field in a}
+        for field in b:
+            fields[field.name] = merge_arrow_types(fields.get(field.name, pa.null()), field.type)
+        return pa.struct([pa.field(name, arrow_type) for name, arrow_type in fields.items()])
+    return pa.string()
+
+def merge_arrow_schemas(a, b):
+    """Union of the columns of two schemas, with merged types"""
+    if a is None:
+        return b
+    fields = {field.name: field.type for field in a}
+    for field in b:
+        fields[field.name] = merge_arrow_types(fields.get(field.name, pa.null()), field.type)
+    return pa.schema([pa.field(name, arrow_type) for name, arrow_type in fields.items()])
+
+def finalize_arrow_type(arrow_type):
+    """Columns that never had a value are written as text"""
+    if pa.types.is_null(arrow_type):
+        return pa.string()
+    if pa.types.is_list(arrow_type):
+        return pa.list_(finalize_arrow_type(arrow_type.value_type))
+    if pa.types.is_map(arrow_type):
+        return pa.map_(pa.string(), finalize_arrow_type(arrow_type.item_type))
+    if pa.types.is_struct(arrow_type):
+        return pa.struct([pa.field(field.name, finalize_arrow_type(field.type)) for field in arrow_type])
+    return arrow_type
+
+def to_arrow_value(value, arrow_type):
+    """Convert a Python value to the shape pyarrow expects for `arrow_type`"""
+    if value is None:
+        return None
+    if pa.types.is_map(arrow_type):
+        return [(str(k), to_arrow_value(v, arrow_type.item_type)) for k, v in value.items()]
+    if pa.types.is_struct(arrow_type):
+        return {field.name: to_arrow_value(value.get(field.name), field.type) for field in arrow_type}
+    if pa.types.is_list(arrow_type):
+        return [to_arrow_value(v, arrow_type.value_type) for v in value]
+    if pa.types.is_string(arrow_type) and isinstance(value, (dict, list, tuple)):
+        # Nested values in a text column (e.g. a map merged with a struct)
+        return json.dumps(value, ensure_ascii=False, default=str)
+    if pa.types.is_string(arrow_type) and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+class ColumnarWriter(RecordWriter):
+    """
+    Base class for Arrow based writers. Parquet and Arrow files need their
+    schema up front, so batches of `batch_size` records are spooled to a
+    temporary file while the schema is inferred and widened batch by batch
+    (see merge_arrow_types); the file is written on close, one row group
+    per batch. Memory use stays at one batch.
+    """
+
+    def __init__(self, filename, batch_size=10000, compression="zstd"):
+        load_pyarrow()
+        self.filename = filename
+        self.batch_size = batch_size
+        self.compression = compression
+        self.count = 0
+        self.schema = None
+        self._buffer = []
+        self._batches = 0
+        self._spool = tempfile.TemporaryFile()
+        self._file = None
+
+    def _open(self, schema):
+        raise NotImplementedError
+
+    def _write_table(self, table):
+        raise NotImplementedError
+
+    def write(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Spool the buffered records and widen the schema to fit them"""
+        if not self._buffer:
+            return
+        self.schema = merge_arrow_schemas(self.schema, infer_arrow_schema(self._buffer))
+        pickle.dump(self._buffer, self._spool, protocol=pickle.HIGHEST_PROTOCOL)
+        self._batches += 1
+        self._buffer = []
+
+    def _table(self, records):
+        rows = [
+            {field.name: to_arrow_value(record.get(field.name), field.type) for field in self.schema}
+            for record in records
+        ]
+        try:
+            return pa.Table.from_pylist(rows, schema=self.schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Name the column that does not fit its type
+            for field in self.schema:
+                try:
+                    pa.array([row[field.name] for row in rows], type=field.type)
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                    raise ValueError(f"Cannot export column '{field.name}' as {field.type}: {e}") from e
+            raise
+
+    def close(self):
+        self.flush()
+        if self._spool is None:
+            return
+        try:
+            if self._batches:
+                self.schema = pa.schema([
+                    pa.field(field.name, finalize_arrow_type(field.type)) for field in self.schema
+                ])
+                self._file = self._open(self.schema)
+                self._spool.seek(0)
+                for _ in range(self._batches):
+                    self._write_table(self._table(pickle.load(self._spool)))
+        finally:
+            self._spool.close()
+            self._spool = None
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class ParquetWriter(ColumnarWriter):
+    """Write records to a Parquet file, one row group per batch"""
+
+    def __init__(self, filename="results.parquet", batch_size=10000, compression="zstd"):
+        super().__init__(filename, batch_size, compression)
+
+    def _open(self, schema):
+        return pq.ParquetWriter(self.filename, schema, compression=self.compression)
+
+    def _write_table(self, table):
+        self._file.write_table(table, row_group_size=self.batch_size)
+
+
+class ArrowWriter(ColumnarWriter):
+    """Write records to an Arrow IPC file (supports zstd and lz4 compression)"""
+
+    def __init__(self, filename="results.arrow", batch_size=10000, compression="zstd"):
+        super().__init__(filename, batch_size, compression)
+
+    def _open(self, schema):
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return pa.ipc.new_file(self.filename, schema, options=options)
+
+    def _write_table(self, table):
+        self._file.write_table(table, max_chunksize=self.batch_size)
+
+
+# Writer class for each export format
+WRITERS = {
+    "csv": CSVWriter,
+    "json": JSONArrayWriter,
+    "jsonl": JSONLinesWriter,
+    "xml": XMLWriter,
+    "parquet": ParquetWriter,
+    "arrow": ArrowWriter,
+}
+
+def get_writer(format_type, filename):
+    """Create a streaming writer for the given format"""
+    if format_type not in WRITERS:
+        raise ValueError(f"Unsupported format: {format_type}")
+    return WRITERS[format_type](filename)
 
 def export_to_csv(data_list, filename="results.csv"):
-    # Create or validate header
-    if data_list and isinstance(data_list[0], dict):
-        headers = list(data_list[0].keys())
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(data_list)
+    with CSVWriter(filename) as writer:
+        return writer.write_all(data_list)
 
 def export_to_json(data_list, filename="results.json"):
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data_list, f, indent=4, ensure_ascii=False)
+    with JSONArrayWriter(filename) as writer:
+        return writer.write_all(data_list)
 
 def export_to_xml(data_list, filename="results.xml"):
-    root = ET.Element("data")
-    
-    for item in data_list:
-        item_elem = ET.SubElement(root, "item")
-        for key, value in item.items():
-            child = ET.SubElement(item_elem, key)
-            child.text = str(value)
-    
-    rough_string = ET.tostring(root, 'utf-8')
-    reparsed = minidom.parseString(rough_string)
-    pretty_xml = reparsed.toprettyxml(indent="  ")
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(pretty_xml)
+    with XMLWriter(filename) as writer:
+        return writer.write_all(data_list)
+
+def export_iter_to_jsonl(records, filename="results.jsonl"):
+    """Write records one per line as they arrive; returns number of records"""
+    with JSONLinesWriter(filename) as writer:
+        return writer.write_all(records)
@@ -0,0 +1,190 @@
+# scraper/extraction.py
+
+import re
+import functools
+import threading
+import lxml.html
+from lxml import etree
+from collections import OrderedDict
+
+# Evaluates an extraction spec (see extraction_spec) in one round trip.
+# Text is textContent without script/style contents and with whitespace
+# collapsed, which unlike WebElement.text does not force a layout.
+EXTRACT_MANY_JS = """
+var specs = arguments[0], results = {};
+var SKIP = {SCRIPT: 1, STYLE: 1, NOSCRIPT: 1, TEMPLATE: 1};
+function textOf(element) {
+    var walker = document.createTreeWalker(element, NodeFilter.SHOW_TEXT, null), parts = [], node;
+    while ((node = walker.nextNode())) {
+        if (!SKIP[node.parentNode.nodeName]) parts.push(node.nodeValue);
+    }
+    return parts.join(' ').replace(/\\s+/g, ' ').trim();
+}
+for (var i = 0; i < specs.length; i++) {
+    var name = specs[i][0], selector = specs[i][1], attrs = specs[i][2], multiple = specs[i][3];
+    var elements;
+    try {
+        elements = document.querySelectorAll(selector);
+    } catch (e) {
+        results[name] = {selector: selector, count: 0, matches: [], error: e.message};
+        continue;
+    }
+    var matches = [];
+    for (var j = 0; j < (multiple ? elements.length : Math.min(1, elements.length)); j++) {
+        var values = {};
+        for (var k = 0; k < attrs.length; k++) values[attrs[k]] = elements[j].getAttribute(attrs[k]);
+        matches.push({text: textOf(elements[j]), attrs: values});
+    }
+    results[name] = {selector: selector, count: elements.length, matches: matches};
+}
+return results;
+"""
+
+
+def extraction_spec(selectors, attrs=None, multiple=False):
+    """
+    Normalize selectors into a list of [name, selector, attrs, multiple].
+
+    `selectors` is a selector, a list of selectors (named by themselves) or
+    a dict of name -> selector or name -> {"selector", "attrs", "multiple"};
+    `attrs` and `multiple` are the defaults for entries that do not set them.
+    """
+    if isinstance(selectors, str):
+        selectors = [selectors]
+    if not isinstance(selectors, dict):
+        selectors = {selector: selector for selector in selectors}
+    spec = []
+    for name, value in selectors.items():
+        if isinstance(value, str):
+            value = {"selector": value}
+        spec.append([name, value["selector"], list(value.get("attrs", attrs or [])), bool(value.get("multiple", multiple))])
+    return spec
+
+
+def first_texts(results):
+    """Map each name of an extract_many result to the text of its first match ("" if none)"""
+    return {name: result["matches"][0]["text"] if result["matches"] else "" for name, result in results.items()}
+
+
+# Text inside these elements is not page text (same as EXTRACT_MANY_JS)
+SKIP_TEXT_TAGS = {"script", "style", "noscript", "template"}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=512)
+def compile_selector(selector):
+    """CSS selector compiled to XPath once; translation costs far more than evaluation"""
+    # Imported here: lxml.cssselect needs the optional cssselect package
+    from lxml.cssselect import CSSSelector, ExpressionError, SelectorError
+    try:
+        return CSSSelector(selector)
+    except (SelectorError, ExpressionError) as e:
+        raise ValueError(f"Invalid selector {selector}: {e}")
+
+
+def element_text(element):
+    """Text of an element like EXTRACT_MANY_JS computes it in the browser"""
+    parts = []
+    for node in element.xpath(".//text()"):
+        owner = node.getparent()
+        if node.is_tail:
+            owner = owner.getparent()
+        if owner is not None and owner.tag not in SKIP_TEXT_TAGS:
+            parts.append(node)
+    return _WHITESPACE_RE.sub(" ", " ".join(parts)).strip()
+
+
+# Pages are parsed from UTF-8 bytes: lxml refuses str input that starts
+# with an XML encoding declaration (XHTML pages)
+_html_parser = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def parse_html(html):
+    """Parse a page into an lxml tree; empty (or comment-only) pages give an empty <html>"""
+    if isinstance(html, str):
+        html = html.encode("utf-8", "replace")
+    if html and html.strip():
+        try:
+            return lxml.html.document_fromstring(html, parser=_html_parser)
+        except etree.ParserError:
+            pass
+    return lxml.html.Element("html")
+
+
+class Snapshot:
+    """
+    Rendered HTML of a page, parsed once into an lxml tree so any number of
+    extractions can run offline, after the browser has moved on (or been
+    returned to its pool). extract_many returns the same structure as
+    WebScraper.extract_many.
+    """
+
+    def __init__(self, html, url=None):
+        self.html = html
+        self.url = url
+        self._root = None
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        # Parsed on first use, so taking a snapshot costs only page_source
+        with self._lock:
+            if self._root is None:
+                self._root = parse_html(self.html)
+            return self._root
+
+    @property
+    def title(self):
+        return (self.root.findtext(".//title") or "").strip()
+
+    def extract_many(self, selectors, attrs=None, multiple=False) -> dict:
+        return self.extract_spec(extraction_spec(selectors, attrs, multiple))
+
+    def extract_spec(self, spec) -> dict:
+        """extract_many for a spec already normalized with extraction_spec"""
+        results = {}
+        for name, selector, names, all_matches in spec:
+            try:
+                elements = compile_selector(selector)(self.root)
+            except ValueError as e:
+                results[name] = {"selector": selector, "count": 0, "matches": [], "error": str(e)}
+                continue
+            matches = [
+                {"text": element_text(element), "attrs": {attr: element.get(attr) for attr in names}}
+                for element in (elements if all_matches else elements[:1])
+            ]
+            results[name] = {"selector": selector, "count": len(elements), "matches": matches}
+        return results
+
+
+class SnapshotCache:
+    """Most recently used snapshots by URL"""
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            snapshot = self._snapshots.get(url)
+            if snapshot is not None:
+                self._snapshots.move_to_end(url)
+            return snapshot
+
+    def put(self, url, snapshot):
+        with self._lock:
+            self._snapshots[url] = snapshot
+            self._snapshots.move_to_end(url)
+            while len(self._snapshots) > self.max_size:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def discard(self, url):
+        with self._lock:
+            self._snapshots.pop(url, None)
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
@@ -0,0 +1,169 @@
+# scraper/fetcher.py
+
+import re
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+# Text inside <noscript> that means the page is useless without JavaScript
+NOSCRIPT_MARKERS = re.compile(r"enable javascript|javascript is (disabled|required)|requires javascript", re.I)
+
+# Empty mount points of single-page apps (React, Vue, Next.js, Angular)
+SPA_ROOTS = ["div#root", "div#app", "div#__next", "app-root"]
+
+
+class Fetcher:
+    """
+    Fetch pages with a pooled HTTP session and fall back to a browser
+    only when the page needs JavaScript.
+
+    Per-domain rules override the heuristics: "http" never escalates,
+    "browser" always renders. Rules match the domain and its subdomains.
+    """
+
+    def __init__(self, scraper=None, domain_rules=None, timeout=15, min_text_length=200, pool_size=10, cache=None):
+        # WebScraper or BrowserPool used for pages that need rendering
+        self.scraper = scraper
+        # Optional HTTPCache for conditional requests
+        self.cache = cache
+        self._own_scraper = False
+        self.domain_rules = domain_rules or {}
+        self.timeout = timeout
+        self.min_text_length = min_text_length
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def rule_for(self, url):
+        """Return the rule configured for the URL's domain, if any"""
+        host = urlparse(url).hostname or ""
+        parts = host.split(".")
+        for i in range(len(parts)):
+            rule = self.domain_rules.get(".".join(parts[i:]))
+            if rule:
+                return rule
+        return None
+
+    def needs_javascript(self, html, selector=None):
+        """
+        Decide if a page fetched over HTTP has to be rendered in a browser.
+        Returns the reason as a string, or None if the HTML is usable.
+        """
+        if not html or not html.strip():
+            return "empty body"
+        return self._needs_javascript(BeautifulSoup(html, "lxml"), selector)
+
+    def _needs_javascript(self, soup, selector=None):
+        if selector and not soup.select_one(selector):
+            return f"selector '{selector}' not found"
+
+        for noscript in soup.find_all("noscript"):
+            if NOSCRIPT_MARKERS.search(noscript.get_text()):
+                return "noscript marker"
+
+        for root in SPA_ROOTS:
+            element = soup.select_one(root)
+            if element is not None and not element.get_text(strip=True):
+                return f"empty app root '{root}'"
+
+        body = soup.body
+        text = body.get_text(" ", strip=True) if body else ""
+        if len(text) < self.min_text_length:
+            return "too little text"
+
+        return None
+
+    def fetch_http(self, url):
+        """Plain GET using the pooled session (and the HTTP cache if set)"""
+        if self.cache is not None:
+            return self.cache.get(self.session, url, timeout=self.timeout)
+        return self.session.get(url, timeout=self.timeout)
+
+    def fetch_browser(self, url):
+        """Render the page in a browser session and return its HTML, title and final URL"""
+        if self.scraper is None:
+            from scraper.webscraper import WebScraper
+            self.scraper = WebScraper()
+            self._own_scraper = True
+
+        if hasattr(self.scraper, "lease"):
+            with self.scraper.lease() as session:
+                session.navigate(url)
+                return session.get_html(), session.driver.title, session.driver.current_url
+
+        self.scraper.navigate(url)
+        return self.scraper.get_html(), self.scraper.driver.title, self.scraper.driver.current_url
+
+    def fetch(self, url, selector=None):
+        """
+        Fetch a page, trying HTTP first.
+
+        Args:
+            url: Page URL
+            selector: Optional CSS selector that must be present in the HTML
+
+        Returns:
+            Dictionary with url, final_url (after redirects), html, title,
+            engine ("http" or "browser") and the reason for escalating to
+            the browser (or None)
+        """
+        rule = self.rule_for(url)
+        reason = "domain rule"
+
+        if rule != "browser":
+            try:
+                response = self.fetch_http(url)
+                content_type = response.headers.get("Content-Type", "")
+                if response.status_code != 200:
+                    reason = f"HTTP {response.status_code}"
+                elif "html" not in content_type and "xml" not in content_type:
+                    reason = f"content type {content_type or 'unknown'}"
+                else:
+                    html = response.text
+                    if not html.strip():
+                        reason = "empty body"
+                    else:
+                        soup = BeautifulSoup(html, "lxml")
+                        reason = None if rule == "http" else self._needs_javascript(soup, selector)
+                    if reason is None:
+                        return {
+                            "url": url,
+                            "final_url": response.url or url,
+                            "html": html,
+                            "title": soup.title.get_text(strip=True) if soup.title else "",
+                            "engine": "http",
+                            "reason": None
+                        }
+            except requests.RequestException as e:
+                reason = f"HTTP error: {e}"
+
+            if rule == "http":
+                raise ConnectionError(f"Could not fetch {url} over HTTP: {reason}")
+
+        html, title, final_url = self.fetch_browser(url)
+        return {
+            "url": url,
+            "final_url": final_url,
+            "html": html,
+            "title": title,
+            "engine": "browser",
+            "reason": reason
+        }
+
+    def close(self):
+        """Close the HTTP session and the browser if this fetcher started it"""
+        self.session.close()
+        if self._own_scraper:
+            self.scraper.close()
+            self.scraper = None
+            self._own_scraper = False
+
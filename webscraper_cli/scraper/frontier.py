@@ -0,0 +1,399 @@
+# scraper/frontier.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import requests
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+from scraper.db import DB_DIR, SQLITE_PRAGMAS
+
+FRONTIER_PATH = os.path.join(DB_DIR, "frontier.db")
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "yclid"}
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Links to these are never pages worth rendering
+SKIP_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".pdf", ".zip", ".gz",
+    ".mp3", ".mp4", ".avi", ".mov", ".css", ".js", ".woff", ".woff2", ".exe", ".dmg",
+)
+
+ROBOTS_USER_AGENT = "*"
+
+SCHEMA = [
+    # Seen-set: 64-bit URL hashes only, INTEGER PRIMARY KEY is the rowid itself
+    "CREATE TABLE IF NOT EXISTS frontier_seen (hash INTEGER PRIMARY KEY)",
+    '''
+    CREATE TABLE IF NOT EXISTS frontier_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT,
+        host TEXT,
+        depth INTEGER,
+        priority REAL,
+        state TEXT DEFAULT 'queued'
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_frontier_queue_next ON frontier_queue (state, priority, id)",
+    # Hosts of the seed URLs, the only hosts links are followed to with same_host
+    "CREATE TABLE IF NOT EXISTS frontier_hosts (host TEXT PRIMARY KEY)",
+]
+
+
+def normalize_url(url, base=None):
+    """
+    Canonical form of a link, so trivially different spellings of a URL
+    are crawled once: absolute, lowercase scheme and host, no default port,
+    no fragment, no tracking parameters, sorted query, "/" for an empty path.
+    Returns None for links that are not http(s).
+    """
+    url = urljoin(base, url.strip()) if base else url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def extract_links(snapshot, base_url=None):
+    """Normalized, de-duplicated links of a page (a Snapshot), honouring <base href> and rel=nofollow"""
+    root = snapshot.root
+    base = base_url or snapshot.url or ""
+    base_href = root.xpath("//base/@href")
+    if base_href:
+        base = urljoin(base, base_href[0])
+    links = []
+    for anchor in root.xpath("//a[@href]"):
+        if "nofollow" in (anchor.get("rel") or "").lower():
+            continue
+        url = normalize_url(anchor.get("href"), base)
+        if url and not urlsplit(url).path.lower().endswith(SKIP_EXTENSIONS):
+            links.append(url)
+    return list(dict.fromkeys(links))
+
+
+def url_hash(url):
+    """Signed 64-bit hash of a URL for the seen-set"""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now=None):
+        """Seconds until a request may be made (0 if one may be made now)"""
+        now = now or time.monotonic()
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now=None):
+        self._refill(now or time.monotonic())
+        self.tokens -= 1
+
+
+class RobotsCache:
+    """robots.txt rules per host, fetched on first use"""
+
+    def __init__(self, user_agent=ROBOTS_USER_AGENT, timeout=10):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._parsers = {}
+
+    def known(self, origin):
+        return origin in self._parsers
+
+    def load(self, origin):
+        """Fetch and parse robots.txt for an origin such as https://example.com"""
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = self.session.get(f"{origin}/robots.txt", timeout=self.timeout)
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(response.text.splitlines())
+        except requests.RequestException:
+            # Unreachable robots.txt: crawl, the page fetch will fail anyway if the host is down
+            parser.allow_all = True
+        self._parsers[origin] = parser
+        return parser
+
+    def allowed(self, origin, url):
+        return self._parsers[origin].can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, origin):
+        parser = self._parsers[origin]
+        delay = parser.crawl_delay(self.user_agent)
+        rate = parser.request_rate(self.user_agent)
+        if rate and rate.requests:
+            delay = max(delay or 0, rate.seconds / rate.requests)
+        return delay
+
+    def close(self):
+        self.session.close()
+
+
+class Frontier:
+    """
+    Queue of URLs to crawl, stored in SQLite so a large crawl does not
+    live in memory.
+
+    - URLs are normalized and de-duplicated through an on-disk set of
+      64-bit URL hashes.
+    - The next URL is the one with the lowest priority value (by default its
+      depth, i.e. breadth-first; pass `score(url, depth)` to change that)
+      among hosts that may be contacted now.
+    - Each host has a token bucket of `host_rate` requests per second,
+      slowed down to the robots.txt Crawl-delay / Request-rate if larger;
+      URLs disallowed by robots.txt are dropped.
+
+    Iterating over a Frontier yields URLs as they become due and ends when
+    nothing is queued and no dispatched URL is still being processed. Call
+    acquire(url) right before fetching a yielded URL (the host's token is
+    taken then, however long the URL waited for a worker) and
+    complete(url, links) once it is processed. A host has at most one
+    yielded URL waiting for acquire(), so other hosts are not held up.
+    """
+
+    def __init__(self, path=FRONTIER_PATH, max_depth=2, max_pages=None, same_host=True,
+                 host_rate=1.0, burst=1, respect_robots=True, score=None):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.same_host = same_host
+        self.host_rate = host_rate
+        self.burst = burst
+        self.score = score or (lambda url, depth: depth)
+        self.robots = RobotsCache() if respect_robots else None
+
+        # Statistics
+        self.dispatched = 0
+        self.disallowed = 0
+
+        self._buckets = {}
+        self._in_flight = {}
+        # Yielded URLs whose fetch has not started yet -> host
+        self._waiting = {}
+        self._cond = threading.Condition()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+        for name, value in SQLITE_PRAGMAS.items():
+            self.conn.execute(f"PRAGMA {name}={value}")
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+            # URLs dispatched by a previous run that never completed are due again
+            self.conn.execute("UPDATE frontier_queue SET state = 'queued' WHERE state = 'in_flight'")
+        self._hosts = {row[0] for row in self.conn.execute("SELECT host FROM frontier_hosts")}
+
+    def clear(self):
+        """Forget all queued and seen URLs"""
+        with self._cond, self.conn:
+            self.conn.execute("DELETE FROM frontier_queue")
+            self.conn.execute("DELETE FROM frontier_seen")
+            self.conn.execute("DELETE FROM frontier_hosts")
+            self._hosts.clear()
+            self._in_flight.clear()
+            self._waiting.clear()
+
+    def _add(self, url, depth):
+        """Queue a normalized URL unless already seen (lock held, inside a transaction)"""
+        if self.conn.execute("INSERT OR IGNORE INTO frontier_seen (hash) VALUES (?)", (url_hash(url),)).rowcount == 0:
+            return False
+        self.conn.execute(
+            "INSERT INTO frontier_queue (url, host, depth, priority) VALUES (?, ?, ?, ?)",
+            (url, urlsplit(url).netloc, depth, self.score(url, depth))
+        )
+        return True
+
+    def add(self, url, depth=0):
+        """
+        Add a seed URL; with same_host its host becomes allowed for links.
+        Returns True if the URL was new.
+        """
+        url = normalize_url(url)
+        if not url:
+            return False
+        with self._cond, self.conn:
+            host = urlsplit(url).netloc
+            if host not in self._hosts:
+                self._hosts.add(host)
+                self.conn.execute("INSERT OR IGNORE INTO frontier_hosts (host) VALUES (?)", (host,))
+            added = self._add(url, depth)
+            self._cond.notify_all()
+        return added
+
+    def complete(self, url, links=(), failed=False):
+        """
+        Mark a dispatched URL as processed and queue the links found on it.
+        A failed URL stays in the queue (state 'failed') so retry() can
+        queue it again.
+        """
+        with self._cond, self.conn:
+            row_id, depth = self._in_flight.pop(url, (None, 0))
+            self._waiting.pop(url, None)
+            if row_id is not None and failed:
+                self.conn.execute("UPDATE frontier_queue SET state = 'failed' WHERE id = ?", (row_id,))
+            elif row_id is not None:
+                self.conn.execute("DELETE FROM frontier_queue WHERE id = ?", (row_id,))
+            if depth < self.max_depth:
+                for link in links:
+                    link = normalize_url(link)
+                    if link and (not self.same_host or urlsplit(link).netloc in self._hosts):
+                        self._add(link, depth + 1)
+            self._cond.notify_all()
+
+    def retry(self, urls):
+        """Queue failed URLs again; returns how many were queued"""
+        retried = 0
+        with self._cond, self.conn:
+            for url in urls:
+                retried += self.conn.execute(
+                    "UPDATE frontier_queue SET state = 'queued' WHERE state = 'failed' AND url = ?", (url,)
+                ).rowcount
+            self._cond.notify_all()
+        return retried
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.host_rate, self.burst)
+        return self._buckets[host]
+
+    def _next(self):
+        """
+        Pick the next due URL (lock held).
+        Returns (row, 0) when a URL is due, (None, seconds) when all queued
+        hosts are throttled, (None, None) when nothing is queued or the
+        queued hosts wait for acquire() or complete().
+        """
+        now = time.monotonic()
+        delays = {host: bucket.delay(now) for host, bucket in self._buckets.items()}
+        throttled = [host for host, delay in delays.items() if delay > 0]
+        blocked = list(dict.fromkeys(throttled + list(self._waiting.values())))
+        # SQLite limits the number of parameters; with more blocked hosts
+        # than that a blocked host may be picked and simply waited for
+        blocked = blocked[:30000]
+        row = self.conn.execute(
+            "SELECT id, url, host, depth FROM frontier_queue WHERE state = 'queued' "
+            f"AND host NOT IN ({','.join('?' * len(blocked))}) ORDER BY priority, id LIMIT 1",
+            blocked
+        ).fetchone()
+        if row:
+            delay = delays.get(row[2], 0)
+            if delay > 0:
+                return None, delay
+            return (row, 0) if row[2] not in self._waiting.values() else (None, None)
+        if throttled and self.conn.execute("SELECT 1 FROM frontier_queue WHERE state = 'queued' LIMIT 1").fetchone():
+            return None, min(delays[host] for host in throttled)
+        return None, None
+
+    def _check_robots(self, url, host):
+        """Load robots.txt for a new host (without the lock); False if the URL is disallowed"""
+        origin = f"{urlsplit(url).scheme}://{host}"
+        if not self.robots.known(origin):
+            self.robots.load(origin)
+            delay = self.robots.crawl_delay(origin)
+            if delay:
+                with self._cond:
+                    bucket = self._bucket(host)
+                    bucket.rate = min(bucket.rate, 1 / delay)
+        return self.robots.allowed(origin, url)
+
+    def __iter__(self):
+        while True:
+            with self._cond:
+                if self.max_pages is not None and self.dispatched >= self.max_pages:
+                    return
+                row, delay = self._next()
+                if row is None:
+                    if delay is None and not self._in_flight:
+                        return
+                    # Wake up when a host is due or new links arrive
+                    self._cond.wait(delay)
+                    continue
+                row_id, url, host, depth = row
+                # Claimed before robots.txt is checked so no other consumer takes it
+                self.conn.execute("UPDATE frontier_queue SET state = 'in_flight' WHERE id = ?", (row_id,))
+                self.conn.commit()
+                self._in_flight[url] = (row_id, depth)
+
+            if self.robots and not self._check_robots(url, host):
+                self.disallowed += 1
+                self.complete(url)
+                continue
+
+            with self._cond:
+                self._waiting[url] = host
+                self.dispatched += 1
+            yield url
+
+    def acquire(self, url):
+        """
+        Wait until the host of a yielded URL may be contacted and take its
+        token. Call right before the request, so the host rate (and
+        robots.txt Crawl-delay) holds at request time.
+        """
+        with self._cond:
+            host = self._waiting.get(url) or urlsplit(url).netloc
+            bucket = self._bucket(host)
+            delay = bucket.delay()
+            while delay > 0:
+                self._cond.wait(delay)
+                delay = bucket.delay()
+            bucket.take()
+            self._waiting.pop(url, None)
+            # The host may have another URL dispatched now
+            self._cond.notify_all()
+
+    def depth(self, url):
+        """Depth of a dispatched URL"""
+        with self._cond:
+            return self._in_flight.get(url, (None, None))[1]
+
+    def stats(self):
+        with self._cond:
+            queued = self.conn.execute("SELECT COUNT(*) FROM frontier_queue WHERE state = 'queued'").fetchone()[0]
+            failed = self.conn.execute("SELECT COUNT(*) FROM frontier_queue WHERE state = 'failed'").fetchone()[0]
+            seen = self.conn.execute("SELECT COUNT(*) FROM frontier_seen").fetchone()[0]
+            return {
+                "queued": queued,
+                "in_flight": len(self._in_flight),
+                "failed": failed,
+                "seen": seen,
+                "dispatched": self.dispatched,
+                "disallowed": self.disallowed,
+            }
+
+    def close(self):
+        if self.robots:
+            self.robots.close()
+        with self._cond:
+            self.conn.close()
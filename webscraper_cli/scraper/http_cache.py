@@ -0,0 +1,239 @@
+# scraper/http_cache.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import requests
+from email.utils import parsedate_to_datetime
+from requests.structures import CaseInsensitiveDict
+
+# Headers a 304 response may update on the stored response
+REVALIDATION_HEADERS = ["Cache-Control", "Expires", "Date", "ETag", "Last-Modified"]
+
+# The stored body is already decoded, so these no longer apply to it
+DROPPED_HEADERS = ["content-encoding", "content-length", "transfer-encoding"]
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS vary (
+        url TEXT PRIMARY KEY,
+        headers TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        url TEXT,
+        status INTEGER,
+        headers TEXT,
+        body BLOB,
+        etag TEXT,
+        last_modified TEXT,
+        stored_at REAL,
+        max_age REAL,
+        size INTEGER,
+        last_access REAL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)",
+]
+
+
+def parse_cache_control(headers):
+    """Return Cache-Control directives as a dict, e.g. {"max-age": "60", "no-cache": None}"""
+    directives = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+def freshness_lifetime(headers):
+    """Seconds a response may be used without revalidation (0 if it must be revalidated)"""
+    directives = parse_cache_control(headers)
+    if "no-cache" in directives:
+        return 0
+    if directives.get("max-age"):
+        try:
+            return max(0, int(directives["max-age"]))
+        except ValueError:
+            return 0
+    if headers.get("Expires") and headers.get("Date"):
+        try:
+            expires = parsedate_to_datetime(headers["Expires"])
+            date = parsedate_to_datetime(headers["Date"])
+            return max(0, (expires - date).total_seconds())
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+class HTTPCache:
+    """
+    On-disk cache for GET responses, stored in SQLite.
+
+    Responses are keyed by URL, the request headers named in the response's
+    Vary header and the Authorization header. Fresh responses (Cache-Control
+    max-age / Expires) are served without a request; stale ones are
+    revalidated with If-None-Match / If-Modified-Since and reused on 304.
+    When the total body size exceeds `max_size` bytes, the least recently
+    used responses are evicted.
+    """
+
+    def __init__(self, directory="http_cache", max_size=512 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(os.path.join(directory, "cache.db"), check_same_thread=False)
+        self._lock = threading.Lock()
+
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+        self.size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _key(self, url, headers):
+        with self._lock:
+            row = self.conn.execute("SELECT headers FROM vary WHERE url = ?", (url,)).fetchone()
+        names = json.loads(row[0]) if row else []
+        parts = [url, headers.get("Authorization", "")] + [f"{name}:{headers.get(name, '')}" for name in names]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _load(self, key):
+        # Committed right away: an open write transaction would lock out
+        # other HTTPCache instances on the same directory
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT url, status, headers, body, etag, last_modified, stored_at, max_age FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row:
+                self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        if not row:
+            return None
+        names = ("url", "status", "headers", "body", "etag", "last_modified", "stored_at", "max_age")
+        entry = dict(zip(names, row))
+        entry["headers"] = json.loads(entry["headers"])
+        return entry
+
+    def _store(self, url, request_headers, response):
+        vary = [name.strip() for name in response.headers.get("Vary", "").split(",") if name.strip()]
+        if "*" in vary:
+            return
+        lifetime = freshness_lifetime(response.headers)
+        # Without a validator or a freshness lifetime the body could never be reused
+        if not (response.headers.get("ETag") or response.headers.get("Last-Modified") or lifetime > 0):
+            return
+        now = time.time()
+        body = response.content
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS}
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO vary (url, headers) VALUES (?, ?)", (url, json.dumps(vary)))
+        key = self._key(url, request_headers)
+        with self._lock, self.conn:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status, headers, body, etag, last_modified, stored_at, max_age, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, response.status_code, json.dumps(headers), body,
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 now, lifetime, len(body), now)
+            )
+            self.size += len(body) - (old[0] if old else 0)
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used responses until the cache fits in max_size (lock held)"""
+        while self.size > self.max_size:
+            rows = self.conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self.size = 0
+                break
+            for key, size in rows:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.size -= size
+                if self.size <= self.max_size:
+                    break
+
+    def _response(self, entry, request):
+        """Build a requests.Response from a cache entry"""
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["body"]
+        response.url = entry["url"]
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.request = request
+        response.from_cache = True
+        return response
+
+    def get(self, session, url, params=None, headers=None, auth=None, timeout=None):
+        """
+        Send a GET through `session`, using the cache where possible.
+        Returns a requests.Response; `response.from_cache` tells whether
+        the body came from the cache.
+        """
+        request = session.prepare_request(requests.Request("GET", url, params=params, headers=headers, auth=auth))
+        key = self._key(request.url, request.headers)
+        entry = self._load(key)
+
+        if entry and time.time() - entry["stored_at"] < (entry["max_age"] or 0):
+            self.hits += 1
+            return self._response(entry, request)
+
+        if entry:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        settings = session.merge_environment_settings(request.url, {}, None, None, None)
+        response = session.send(request, timeout=timeout, **settings)
+
+        if entry and response.status_code == 304:
+            self.revalidated += 1
+            # 304 carries updated caching headers for the stored response
+            for name in REVALIDATION_HEADERS:
+                if name in response.headers:
+                    entry["headers"][name] = response.headers[name]
+            with self._lock, self.conn:
+                self.conn.execute(
+                    "UPDATE responses SET headers = ?, stored_at = ?, max_age = ? WHERE key = ?",
+                    (json.dumps(entry["headers"]), time.time(),
+                     freshness_lifetime(CaseInsensitiveDict(entry["headers"])), key)
+                )
+            return self._response(entry, request)
+
+        self.misses += 1
+        response.from_cache = False
+        if response.status_code == 200 and "no-store" not in parse_cache_control(response.headers):
+            self._store(request.url, request.headers, response)
+        return response
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "size": self.size,
+        }
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.execute("DELETE FROM vary")
+            self.size = 0
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
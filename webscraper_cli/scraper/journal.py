@@ -0,0 +1,165 @@
+# scraper/journal.py
+
+import os
+import sqlite3
+import datetime
+import threading
+from scraper.db import DB_DIR, SQLITE_PRAGMAS
+
+JOURNAL_PATH = os.path.join(DB_DIR, "crawl_journal.db")
+
+STATES = ["pending", "in_flight", "completed", "failed"]
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS crawl_journal (
+        url TEXT PRIMARY KEY,
+        state TEXT,
+        attempts INTEGER DEFAULT 0,
+        error TEXT,
+        updated_at TEXT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_crawl_journal_state ON crawl_journal (state)",
+]
+
+
+class CrawlJournal:
+    """
+    Records the state of every URL of a crawl (pending, in_flight,
+    completed, failed with the number of attempts) in SQLite, so an
+    interrupted crawl can be resumed without redoing finished pages.
+
+    State changes are kept in memory and written in one transaction by a
+    background checkpoint every `interval` seconds (and on close), so
+    journaling does not add a disk write per page. A hard crash loses at
+    most the last interval; those pages are simply processed again.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, interval=5.0, max_attempts=3):
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        for name, value in SQLITE_PRAGMAS.items():
+            self.conn.execute(f"PRAGMA {name}={value}")
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def reset(self):
+        """Forget the previous crawl"""
+        with self._lock, self.conn:
+            self._dirty.clear()
+            self.conn.execute("DELETE FROM crawl_journal")
+
+    def _entry(self, url):
+        """(state, attempts) of a URL, including unsaved changes (lock held)"""
+        if url in self._dirty:
+            return self._dirty[url][:2]
+        row = self.conn.execute("SELECT state, attempts FROM crawl_journal WHERE url = ?", (url,)).fetchone()
+        return tuple(row) if row else None
+
+    def _set(self, url, state, attempts, error=None):
+        self._dirty[url] = (state, attempts, error, datetime.datetime.now().isoformat())
+
+    def unfinished(self):
+        """
+        URLs a previous run did not finish (pending, in flight, or failed
+        with fewer than max_attempts attempts), read in batches by rowid
+        """
+        last = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT rowid, url FROM crawl_journal WHERE rowid > ? AND "
+                    "(state IN ('pending', 'in_flight') OR (state = 'failed' AND attempts < ?)) "
+                    "ORDER BY rowid LIMIT 1000",
+                    (last, self.max_attempts)
+                ).fetchall()
+            if not rows:
+                return
+            for rowid, url in rows:
+                yield url
+            last = rows[-1][0]
+
+    def urls(self, urls, resume=False):
+        """
+        Journal and yield the URLs to crawl.
+
+        With resume=True, URLs left pending, in flight or failed (with
+        fewer than max_attempts attempts) by the previous run come first,
+        then new URLs from `urls`; URLs already in the journal are skipped.
+        """
+        if resume:
+            yield from self.unfinished()
+        for url in urls:
+            with self._lock:
+                if self._entry(url) is not None:
+                    continue
+                self._set(url, "pending", 0)
+            yield url
+
+    def started(self, url):
+        with self._lock:
+            entry = self._entry(url)
+            self._set(url, "in_flight", (entry[1] if entry else 0) + 1)
+
+    def finished(self, result):
+        """Record a crawl result dict ("url", "success", "error")"""
+        with self._lock:
+            entry = self._entry(result["url"])
+            attempts = entry[1] if entry else 1
+            if result["success"]:
+                self._set(result["url"], "completed", attempts)
+            else:
+                self._set(result["url"], "failed", attempts, result.get("error"))
+
+    def checkpoint(self):
+        """Write pending state changes to disk"""
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [(url, *entry) for url, entry in self._dirty.items()]
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO crawl_journal (url, state, attempts, error, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET state = excluded.state, attempts = excluded.attempts, "
+                    "error = excluded.error, updated_at = excluded.updated_at",
+                    rows
+                )
+            self._dirty.clear()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except sqlite3.Error as e:
+                print(f"Error writing crawl journal checkpoint: {e}")
+
+    def stats(self):
+        """Number of URLs per state"""
+        self.checkpoint()
+        with self._lock:
+            counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM crawl_journal GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in STATES}
+
+    def close(self):
+        """Write the final checkpoint and stop the background thread"""
+        self._stop.set()
+        self._thread.join()
+        self.checkpoint()
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
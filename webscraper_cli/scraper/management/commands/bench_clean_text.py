@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from bs4 import BeautifulSoup
+from scraper.data_processing import clean_text
+import os
+import re
+import time
+
+
+def clean_text_bs4(raw_html: str) -> str:
+    """Previous clean_text implementation, kept as the benchmark baseline"""
+    soup = BeautifulSoup(raw_html, "html.parser")
+    text = soup.get_text(separator=" ")
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return text.strip().lower()
+
+
+class Command(BaseCommand):
+    help = "Benchmarks clean_text against the previous BeautifulSoup implementation on saved pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", help="Directory with saved .html pages")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of passes over the corpus")
+
+    def handle(self, *args, **options):
+        pages = []
+        for name in sorted(os.listdir(options["corpus"])):
+            if name.endswith((".html", ".htm")):
+                with open(os.path.join(options["corpus"], name), encoding="utf-8", errors="replace") as f:
+                    pages.append(f.read())
+        
+        if not pages:
+            print(f"No .html files found in {options['corpus']}")
+            return
+        
+        size_mb = sum(len(page) for page in pages) / 1024 / 1024
+        print(f"Corpus: {len(pages)} pages, {size_mb:.1f} MB, {options['repeat']} passes")
+        
+        results = {}
+        for name, function in (("bs4 (old)", clean_text_bs4), ("lxml", clean_text)):
+            best = None
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                words = sum(len(function(page).split()) for page in pages)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = best
+            print(f"{name:10} {best:8.3f}s  {len(pages) / best:8.1f} pages/s  {words} words")
+        
+        print(f"Speedup: {results['bs4 (old)'] / results['lxml']:.1f}x")
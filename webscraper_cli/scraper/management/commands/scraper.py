@@ -1,30 +1,110 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from scraper.webscraper import WebScraper
-from scraper.exporter import export_to_csv, export_to_json, export_to_xml
-from scraper.data_processing import clean_text, get_top_words, analyze_sentiment, extract_entities
-from scraper.db import save_result
+from scraper.exporter import WRITERS, get_writer, export_iter_to_jsonl
+from scraper.db import get_result_store
 from scraper.api_client import APIClient
+from scraper.resource_policy import RESOURCE_PRESETS, ResourcePolicy
+from scraper.extraction import Snapshot, SnapshotCache
 import datetime
 import os
+import sys
 import json
+import threading
 
 class Command(BaseCommand):
     help = "Runs interactive Web Scraper CLI tool (Django + Selenium)."
 
+    def add_arguments(self, parser):
+        parser.add_argument("mode", nargs="?", default="interactive", choices=["interactive", "crawl", "recipe"],
+                            help="'interactive' (default), 'crawl' to process a list of URLs "
+                                 "or 'recipe' to run an extraction recipe over a list of URLs")
+        parser.add_argument("--urls", default="-",
+                            help="File with one URL per line for crawl mode ('-' reads stdin)")
+        parser.add_argument("--workers", type=int, default=4,
+                            help="Number of browser workers in crawl mode")
+        parser.add_argument("--per-host", type=int, default=2,
+                            help="Maximum concurrent pages per host in crawl mode")
+        parser.add_argument("--max-in-flight", type=int, default=100,
+                            help="Maximum number of URLs queued at once in crawl mode")
+        parser.add_argument("--max-page-loads", type=int, default=100,
+                            help="Restart a browser session after this many pages")
+        parser.add_argument("--prewarm-nlp", action="store_true",
+                            help="Load spaCy/TextBlob in the background at startup instead of on first use")
+        parser.add_argument("--http-cache", metavar="DIR",
+                            help="Cache HTTP responses in DIR and revalidate them with conditional requests")
+        parser.add_argument("--skip-unchanged", action="store_true",
+                            help="Skip processing pages whose text has not changed since the last crawl")
+        parser.add_argument("--collapse-duplicates", action="store_true",
+                            help="With --skip-unchanged, also skip pages that (nearly) duplicate another URL")
+        parser.add_argument("--save-db", action="store_true",
+                            help="Also save the processed pages (title, texts, NLP results) in the SQLite result store")
+        parser.add_argument("--engine", default="auto", choices=["auto", "browser"],
+                            help="'auto' fetches over HTTP and renders in Chrome only when needed")
+        parser.add_argument("--follow-links", action="store_true",
+                            help="In crawl mode, also crawl links found on the pages (the URL list is the seeds)")
+        parser.add_argument("--max-depth", type=int, default=2,
+                            help="With --follow-links, how many links away from a seed to crawl")
+        parser.add_argument("--max-pages", type=int,
+                            help="With --follow-links, stop after dispatching this many pages")
+        parser.add_argument("--host-rate", type=float, default=1.0,
+                            help="With --follow-links, maximum requests per second per host (robots.txt Crawl-delay may lower it)")
+        parser.add_argument("--any-host", action="store_true",
+                            help="With --follow-links, follow links to other hosts than the seeds'")
+        parser.add_argument("--ignore-robots", action="store_true",
+                            help="With --follow-links, do not read robots.txt")
+        parser.add_argument("--frontier", metavar="FILE",
+                            help="SQLite file for the crawl frontier (default: database/frontier.db)")
+        parser.add_argument("--resume", action="store_true",
+                            help="In crawl mode, continue the previous crawl: skip completed URLs, retry unfinished and failed ones")
+        parser.add_argument("--journal", metavar="FILE",
+                            help="SQLite file recording crawl progress (default: database/crawl_journal.db)")
+        parser.add_argument("--max-attempts", type=int, default=3,
+                            help="With --resume, retry failed URLs until they have been tried this many times")
+        parser.add_argument("--recipe", metavar="FILE",
+                            help="Extraction recipe (.json, .yaml or .yml) for recipe mode")
+        parser.add_argument("--output", default="recipe_results.jsonl",
+                            help="JSON Lines file for recipe mode results")
+        parser.add_argument("--resource-policy", choices=list(RESOURCE_PRESETS),
+                            help="Block resources in Chrome, e.g. 'text-only' skips images, fonts, media, CSS and trackers")
+
     def handle(self, *args, **options):
+        if options.get("prewarm_nlp"):
+            from scraper.data_processing import warm_up
+            threading.Thread(target=warm_up, daemon=True).start()
+        
+        if options.get("mode") == "crawl":
+            return self.crawl(options)
+        if options.get("mode") == "recipe":
+            return self.run_recipe(options)
+        
         # Create scraper instance (opens headless browser)
-        scraper = WebScraper()
+        scraper = WebScraper(self.browser_config(options))
         # Create API client instance
         api_client = APIClient()
+        # HTTP-first fetcher, created on first 'fetch'
+        fetcher = None
         print("Welcome to Web Scraper CLI. Type 'help' to see available commands.")
         
         # Data collected from websites and API
         scraped_data = {}
         current_url = None
         
+        # Snapshot mode: pages are parsed once and get_html/get_text run
+        # against the parsed copy instead of the live browser
+        snapshot_mode = False
+        snapshots = SnapshotCache()
+        # Page loaded with 'fetch', which may not be the page shown in the
+        # browser; get_html/get_text read it instead of the live page
+        fetched = None
+        
         while True:
             cmd = input("scraper> ").strip()
             if cmd.lower() in ("exit", "quit"):
+                if fetcher:
+                    fetcher.close()
+                if api_client.cache:
+                    api_client.cache.close()
+                api_client.close()
                 scraper.close()
                 print("Goodbye!")
                 break
@@ -32,8 +112,11 @@ class Command(BaseCommand):
                 self.show_help()
             elif cmd.lower().startswith("navigate "):
                 current_url = cmd[9:].strip()
+                fetched = None
                 try:
                     scraper.navigate(current_url)
+                    if snapshot_mode:
+                        snapshots.put(current_url, scraper.snapshot())
                     # Initialize data for this page
                     scraped_data[current_url] = {
                         "timestamp": datetime.datetime.now().isoformat(),
@@ -44,17 +127,97 @@ class Command(BaseCommand):
                     print(f"Navigation to {current_url} completed successfully")
                 except Exception as e:
                     print(f"Error during navigation: {e}")
+            elif cmd.lower().startswith("fetch "):
+                current_url = cmd[6:].strip()
+                fetched = None
+                try:
+                    if fetcher is None:
+                        from scraper.fetcher import Fetcher
+                        fetcher = Fetcher(scraper=scraper)
+                    page = fetcher.fetch(current_url)
+                    fetched = Snapshot(page["html"], page["final_url"])
+                    if snapshot_mode:
+                        snapshots.put(current_url, fetched)
+                    scraped_data[current_url] = {
+                        "timestamp": datetime.datetime.now().isoformat(),
+                        "title": page["title"],
+                        "html": page["html"],
+                        "texts": {}
+                    }
+                    if page["engine"] == "browser":
+                        print(f"Fetched {current_url} with browser ({page['reason']})")
+                    else:
+                        print(f"Fetched {current_url} over HTTP (use 'navigate' to interact with the page)")
+                except Exception as e:
+                    print(f"Error during fetch: {e}")
+            elif cmd.lower().startswith("recipe "):
+                parts = cmd[7:].split()
+                if len(parts) != 2:
+                    print("Use: recipe [file] [url]")
+                    continue
+                try:
+                    from scraper.recipes import Recipe
+                    result = Recipe.load(parts[0]).run(scraper, parts[1])
+                except (OSError, ValueError, ImportError) as e:
+                    print(f"Invalid recipe {parts[0]}: {e}")
+                    continue
+                if result["success"]:
+                    current_url = parts[1]
+                    fetched = None
+                    scraped_data[current_url] = {
+                        "timestamp": datetime.datetime.now().isoformat(),
+                        "title": scraper.driver.title,
+                        "html": None,
+                        "texts": result["data"]
+                    }
+                    print(json.dumps(result["data"], indent=2, ensure_ascii=False)[:1000])
+                else:
+                    print(f"Recipe failed on {parts[1]}: {result['error']}")
+            elif cmd.lower().startswith("snapshot "):
+                action = cmd[9:].strip().lower()
+                if action == "on":
+                    snapshot_mode = True
+                    print("Snapshot mode enabled: pages are parsed once and extraction runs offline")
+                elif action == "off":
+                    snapshot_mode = False
+                    snapshots.clear()
+                    print("Snapshot mode disabled: extraction queries the browser")
+                else:
+                    print("Use: snapshot on|off")
+            elif cmd.lower().startswith("block "):
+                action = cmd[6:].strip().lower()
+                # Counters come from Chrome's performance log, which only
+                # exists if the browser was started with it
+                stats_available = scraper.read_performance_log() is not None
+                if action == "stats":
+                    if stats_available:
+                        print(scraper.resource_stats.stats())
+                    else:
+                        print("Resource stats are unavailable: this browser was started without the performance log "
+                              "(start the session with --resource-policy to enable them)")
+                elif action in RESOURCE_PRESETS:
+                    scraper.resource_policy = ResourcePolicy.from_config(action)
+                    print(f"Resource policy set to '{action}' (applied on next navigation)")
+                    if not stats_available:
+                        print("Note: 'block stats' is unavailable in this session, the browser has no performance log")
+                else:
+                    print(f"Use: block {'|'.join(RESOURCE_PRESETS)}|stats")
             elif cmd.lower().startswith("click "):
                 selector = cmd[6:].strip()
                 try:
                     scraper.click(selector)
+                    fetched = None
+                    # The click may have changed the page
+                    if snapshot_mode and current_url:
+                        snapshots.put(current_url, scraper.snapshot())
                     print(f"Clicked element: {selector}")
                 except Exception as e:
                     print(f"Error during click: {e}")
             elif cmd.lower() == "get_html":
                 if current_url and current_url in scraped_data:
                     try:
-                        html = scraper.get_html()
+                        snapshot = (snapshots.get(current_url) if snapshot_mode else None) or fetched
+                        html = snapshot.html if snapshot else scraper.get_html()
                         scraped_data[current_url]["html"] = html
                         print("HTML retrieved (first 100 characters):")
                         print(html[:100] + "..." if len(html) > 100 else html)
@@ -64,12 +227,22 @@ class Command(BaseCommand):
                     print("First navigate to a page using 'navigate' command")
             elif cmd.lower().startswith("get_text "):
                 if current_url and current_url in scraped_data:
-                    selector = cmd[9:].strip()
+                    # Several selectors are separated with ';' (CSS selectors may contain commas)
+                    selectors = [selector.strip() for selector in cmd[9:].split(";") if selector.strip()]
+                    # In snapshot mode (or after 'fetch') the browser is not queried
+                    source = (snapshots.get(current_url) if snapshot_mode else None) or fetched or scraper
                     try:
-                        text = scraper.get_text(selector)
-                        scraped_data[current_url]["texts"][selector] = text
-                        print(f"Text from element {selector}:")
-                        print(text[:100] + "..." if len(text) > 100 else text)
+                        for selector, result in source.extract_many(selectors).items():
+                            if result.get("error"):
+                                print(f"Invalid selector {selector}: {result['error']}")
+                                continue
+                            if not result["count"]:
+                                print(f"No element matches {selector}")
+                                continue
+                            text = result["matches"][0]["text"]
+                            scraped_data[current_url]["texts"][selector] = text
+                            print(f"Text from element {selector}:")
+                            print(text[:100] + "..." if len(text) > 100 else text)
                     except Exception as e:
                         print(f"Error retrieving text: {e}")
                 else:
@@ -92,39 +265,44 @@ class Command(BaseCommand):
                     filename = f"{filename}.{format_type}"
                 
                 try:
-                    data_list = []
-                    for url, data in scraped_data.items():
-                        item = {
+                    # Records are built lazily and streamed to the writer
+                    data_list = (
+                        {
                             "url": url,
                             "timestamp": data["timestamp"],
                             "title": data["title"],
                             "html_length": len(data["html"]) if data["html"] else 0,
                             "texts": data["texts"]
                         }
-                        data_list.append(item)
+                        for url, data in scraped_data.items()
+                    )
                     
                     # Add path to export directory
                     export_dir = "exported_data"
                     os.makedirs(export_dir, exist_ok=True)
                     file_path = os.path.join(export_dir, filename)
                     
-                    if format_type == "csv":
-                        export_to_csv(data_list, file_path)
-                    elif format_type == "json":
-                        export_to_json(data_list, file_path)
-                    elif format_type == "xml":
-                        export_to_xml(data_list, file_path)
+                    if format_type in WRITERS:
+                        with get_writer(format_type, file_path) as writer:
+                            writer.write_all(data_list)
                     elif format_type == "db":
-                        for item in data_list:
-                            save_result(item)
+                        get_result_store().save_many(data_list)
                         file_path = "database"
                     else:
-                        print(f"Unsupported format: {format_type}. Available formats: csv, json, xml, db")
+                        print(f"Unsupported format: {format_type}. Available formats: csv, json, jsonl, xml, parquet, arrow, db")
                         continue
                     
                     print(f"Data saved successfully to: {file_path}")
                 except Exception as e:
                     print(f"Error during saving data: {e}")
+            elif cmd.lower().startswith("db_latest "):
+                url = cmd[10:].strip()
+                result = get_result_store().latest(url)
+                if result:
+                    print(f"Latest result for {url} (saved {result.get('timestamp')}):")
+                    print(json.dumps(result, indent=2, ensure_ascii=False)[:300] + "...")
+                else:
+                    print(f"No saved results for {url}")
             elif cmd.lower() == "status":
                 if scraped_data:
                     print("\nScraped pages:")
@@ -140,7 +318,52 @@ class Command(BaseCommand):
             elif cmd.lower() == "clear":
                 scraped_data = {}
                 current_url = None
+                fetched = None
                 print("Cleared all collected data.")
+            elif cmd.lower().startswith("api_get_many "):
+                urls = cmd[13:].split()
+                ok = 0
+                for url, response in api_client.get_many(urls):
+                    status = response.status_code if response is not None else "no response"
+                    if response is not None and response.status_code == 200:
+                        ok += 1
+                    print(f"{status} {url}")
+                print(f"Completed {ok}/{len(urls)} requests successfully")
+            elif cmd.lower().startswith("api_cache "):
+                action = cmd[10:].strip().lower()
+                if action == "on":
+                    from scraper.http_cache import HTTPCache
+                    api_client.cache = api_client.cache or HTTPCache()
+                    print("API response cache enabled")
+                elif action == "off":
+                    if api_client.cache:
+                        api_client.cache.close()
+                    api_client.cache = None
+                    print("API response cache disabled")
+                elif action == "clear" and api_client.cache:
+                    api_client.cache.clear()
+                    print("API response cache cleared")
+                elif action == "stats" and api_client.cache:
+                    print(api_client.cache.stats())
+                else:
+                    print("Use: api_cache on|off|clear|stats (clear/stats need the cache enabled)")
+            elif cmd.lower().startswith("api_paginate "):
+                params = cmd[13:].split()
+                url = params[0]
+                filename = params[1] if len(params) > 1 else f"api_pages_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+                mode = params[2].lower() if len(params) > 2 else "auto"
+                if mode not in ("auto", "offset", "page"):
+                    print(f"Unsupported pagination mode: {mode}. Available modes: auto, offset, page")
+                    continue
+                
+                export_dir = "exported_api"
+                os.makedirs(export_dir, exist_ok=True)
+                file_path = os.path.join(export_dir, filename)
+                try:
+                    count = export_iter_to_jsonl(api_client.iter_records(url, mode=mode), file_path)
+                    print(f"Saved {count} records to: {file_path}")
+                except Exception as e:
+                    print(f"Error during pagination: {e}")
             elif cmd.lower().startswith("api_get "):
                 url = cmd[8:].strip()
                 response = api_client.get(url)
@@ -165,27 +388,258 @@ class Command(BaseCommand):
             else:
                 print(f"Unknown command: {cmd}. Type 'help' to see available options.")
     
+    def crawl(self, options):
+        """Process a list of URLs non-interactively with a pool of browsers"""
+        from scraper.browser_pool import BrowserPool
+        from scraper.crawler import crawl, read_urls
+        from scraper.db import BatchWriter, MongoBulkWriter, close_mongodb_client
+        from scraper.data_processing import page_record, process_dynamic_scrape, process_static_scrape
+        from scraper.dedup import ContentFingerprintCache
+        from scraper.fetcher import Fetcher
+        from scraper.frontier import FRONTIER_PATH, Frontier
+        from scraper.http_cache import HTTPCache
+        from scraper.journal import JOURNAL_PATH, CrawlJournal
+        
+        stream = sys.stdin if options["urls"] == "-" else open(options["urls"], encoding="utf-8")
+        urls = read_urls(stream)
+        resume = options["resume"]
+        # Progress of every URL, checkpointed to disk so the crawl can be resumed
+        journal = CrawlJournal(options["journal"] or JOURNAL_PATH, max_attempts=options["max_attempts"])
+        if not resume:
+            journal.reset()
+        follow = options["follow_links"]
+        frontier = None
+        if follow:
+            # The URL list only seeds the frontier, which then hands out due URLs
+            frontier = Frontier(
+                options["frontier"] or FRONTIER_PATH,
+                max_depth=options["max_depth"],
+                max_pages=options["max_pages"],
+                same_host=not options["any_host"],
+                host_rate=options["host_rate"],
+                respect_robots=not options["ignore_robots"],
+            )
+            if not resume:
+                frontier.clear()
+            else:
+                # Failures the journal still allows attempts for (--max-attempts)
+                frontier.retry(journal.unfinished())
+            for url in urls:
+                frontier.add(url)
+            urls = frontier
+        else:
+            urls = journal.urls(urls, resume=resume)
+        
+        # With the auto engine most pages never need Chrome, so browsers are
+        # only started when a page is escalated to one
+        pool = BrowserPool(size=options["workers"], config=self.browser_config(options),
+                           max_page_loads=options["max_page_loads"], lazy=options["engine"] == "auto")
+        
+        # Processed pages are inserted into MongoDB in bulk
+        mongo_writer = MongoBulkWriter()
+        fingerprints = None
+        if options["skip_unchanged"]:
+            fingerprints = ContentFingerprintCache(collapse_duplicates=options["collapse_duplicates"])
+        
+        cache = None
+        if options["engine"] == "auto":
+            cache = HTTPCache(options["http_cache"]) if options["http_cache"] else None
+            fetcher = Fetcher(scraper=pool, pool_size=options["workers"], cache=cache)
+            process = lambda url: process_static_scrape(fetcher, url, mongo_writer, fingerprints, links=follow)
+        else:
+            fetcher = None
+            process = lambda url: process_dynamic_scrape(pool, url, mongo_writer, fingerprints, links=follow)
+        
+        def journaled(url):
+            if frontier:
+                # Per-host rate is enforced when the request starts, not when queued
+                frontier.acquire(url)
+            journal.started(url)
+            return process(url)
+        results_writer = BatchWriter(get_result_store()) if options["save_db"] else None
+        ok = failed = skipped = unsaved = 0
+        # Results whose document is still buffered in the MongoBulkWriter;
+        # a page only counts as succeeded once its insert is confirmed
+        pending = []
+        
+        def finish(result, links, saved=None):
+            # Runs once the page's document is saved (or failed to save), from
+            # the writer's thread; until then the page stays in flight
+            if saved is not None and saved.exception() is not None:
+                result.update(success=False, error=str(saved.exception()))
+            journal.finished(result)
+            if frontier:
+                frontier.complete(result["url"], links, failed=not result["success"])
+        
+        def report(result):
+            nonlocal ok, failed, skipped, unsaved
+            saved = result.pop("saved", None)
+            if saved is not None and saved.exception() is not None:
+                result.update(success=False, error=str(saved.exception()))
+                unsaved += 1
+            document = result.pop("document", None)
+            if result["success"] and result.get("skipped"):
+                skipped += 1
+                print(f"[{result['skipped']}] {result['url']}")
+            elif result["success"]:
+                ok += 1
+                print(f"[ok] {result['url']}")
+            else:
+                failed += 1
+                print(f"[error] {result['url']}: {result['error']}")
+            # Skipped and failed pages have no new document to save
+            if results_writer and result["success"] and document is not None:
+                results_writer.add(page_record(document, result.get("engine", "browser")))
+        
+        def report_saved():
+            for result in [result for result in pending if result["saved"].done()]:
+                pending.remove(result)
+                report(result)
+        
+        try:
+            for result in crawl(
+                urls,
+                journaled,
+                workers=options["workers"],
+                per_host=options["per_host"],
+                max_in_flight=options["max_in_flight"],
+            ):
+                links = result.pop("links", [])
+                saved = result.get("saved")
+                if saved is not None:
+                    pending.append(result)
+                    saved.add_done_callback(lambda saved, result=result, links=links: finish(result, links, saved))
+                else:
+                    finish(result, links)
+                    report(result)
+                report_saved()
+        except KeyboardInterrupt:
+            print("Crawl interrupted")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if fetcher:
+                fetcher.close()
+            if cache:
+                cache.close()
+            # The last flush resolves the remaining pending results
+            mongo_writer.close()
+            for result in pending:
+                report(result)
+            if results_writer:
+                results_writer.close()
+            if fingerprints:
+                fingerprints.close()
+            if frontier:
+                frontier_stats = frontier.stats()
+                frontier.close()
+            close_mongodb_client()
+            journal_stats = journal.stats()
+            journal.close()
+            stats = pool.stats()
+            pool.close()
+        
+        print(f"Crawl finished: {ok} succeeded, {skipped} skipped, {failed} failed")
+        if journal_stats["pending"] or journal_stats["in_flight"] or journal_stats["failed"]:
+            print(f"Journal: {journal_stats['completed']} completed, {journal_stats['failed']} failed, "
+                  f"{journal_stats['pending'] + journal_stats['in_flight']} unfinished; "
+                  f"run again with --resume to continue")
+        if frontier:
+            print(f"Frontier: {frontier_stats['seen']} URLs seen, {frontier_stats['queued']} still queued, "
+                  f"{frontier_stats['failed']} failed, "
+                  f"{frontier_stats['disallowed']} disallowed by robots.txt")
+        print(f"Browser leases: {stats['leases']}, avg wait {stats['avg_wait']:.2f}s, "
+              f"max wait {stats['max_wait']:.2f}s, recycled {stats['recycled']}")
+        resources = stats["resources"]
+        if resources["blocked"]:
+            print(f"Blocked requests: {resources['blocked']} {resources['blocked_by_type']}, "
+                  f"~{resources['bytes_saved'] / 1024 / 1024:.1f} MB saved, "
+                  f"{resources['bytes_loaded'] / 1024 / 1024:.1f} MB loaded")
+        if unsaved:
+            raise CommandError(f"{unsaved} pages were processed but not saved to MongoDB")
+    
+    def run_recipe(self, options):
+        """Run an extraction recipe over a list of URLs and stream results to a JSON Lines file"""
+        from scraper.browser_pool import BrowserPool
+        from scraper.crawler import read_urls
+        from scraper.recipes import Recipe, RecipeError
+        
+        if not options["recipe"]:
+            print("Recipe mode needs --recipe FILE")
+            return
+        # Validate and compile before starting any browser
+        try:
+            recipe = Recipe.load(options["recipe"])
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Invalid recipe {options['recipe']}: {e}")
+            return
+        
+        stream = sys.stdin if options["urls"] == "-" else open(options["urls"], encoding="utf-8")
+        pool = BrowserPool(size=options["workers"], config=self.browser_config(options),
+                           max_page_loads=options["max_page_loads"])
+        ok = failed = 0
+        
+        try:
+            with get_writer("jsonl", options["output"]) as writer:
+                for result in recipe.run_many(
+                    pool,
+                    read_urls(stream),
+                    workers=options["workers"],
+                    per_host=options["per_host"],
+                    max_in_flight=options["max_in_flight"],
+                ):
+                    writer.write(result)
+                    if result["success"]:
+                        ok += 1
+                        print(f"[ok] {result['url']}")
+                    else:
+                        failed += 1
+                        print(f"[error] {result['url']}: {result['error']}")
+        except KeyboardInterrupt:
+            print("Recipe run interrupted")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            pool.close()
+        
+        print(f"Recipe '{recipe.name}' finished: {ok} succeeded, {failed} failed, results in {options['output']}")
+    
+    def browser_config(self, options):
+        """WebScraper config from command line options"""
+        config = {}
+        if options.get("resource_policy"):
+            config["resource_policy"] = options["resource_policy"]
+        return config
+    
     def show_help(self):
         print("""
         Available commands:
         
         Web scraper commands:
         - navigate [url] - navigate to specified URL
+        - fetch [url] - fetch page over HTTP, using the browser only if it needs JavaScript
         - click [selector] - click element with specified CSS selector
+        - block [none|no-trackers|no-media|text-only|stats] - block resources on next navigations, or show blocked counts
+        - recipe [file] [url] - run an extraction recipe (.json/.yaml) on a URL and save the extracted fields
+        - snapshot [on|off] - parse each loaded page once and run get_html/get_text against the parsed copy
         - get_html - retrieve and save HTML code of current page
-        - get_text [selector] - retrieve and save text from element
-        - save [format] [filename] - save collected data
+        - get_text [selector]; [selector] ... - retrieve and save text from one or more elements
+        - save [format] [filename] - save collected data (csv, json, jsonl, xml, parquet, arrow, db)
         
         API REST commands:
         - api_get [url] - execute GET request to API
+        - api_get_many [url] [url] ... - execute GET requests to several URLs concurrently
+        - api_paginate [url] [filename] [auto|offset|page] - fetch all pages and stream records to a JSON Lines file
         - api_post [url] [json_data] - execute POST request to API
         - api_auth_basic [username] [password] - set Basic authentication
         - api_auth_token [token] - set Bearer token authentication
         - api_header [key] [value] - set HTTP header
         - api_save [filename] - save last API response to file
         - api_info - show information about last response
+        - api_cache [on|off|clear|stats] - cache API responses on disk and revalidate them
         
         Other commands:
+        - db_latest [url] - show the latest result saved in the database for URL
         - status - show amount and type of collected data
         - clear - clear all collected data
         - help - display this help
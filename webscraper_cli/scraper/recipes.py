@@ -0,0 +1,271 @@
+# scraper/recipes.py
+
+import os
+import json
+from urllib.parse import urljoin
+from scraper.crawler import crawl
+from scraper.extraction import compile_selector, extraction_spec
+from scraper.waits import WaitStrategy
+
+# PyYAML is only needed for YAML recipes, see load_yaml
+yaml = None
+
+STEP_KINDS = ["navigate", "click", "wait", "extract", "follow"]
+EXTRACT_SOURCES = ["snapshot", "browser"]
+
+
+def load_yaml():
+    global yaml
+    if yaml is None:
+        try:
+            import yaml as pyyaml
+        except ImportError:
+            raise ImportError("YAML recipes require PyYAML: pip install pyyaml (or write the recipe as JSON)")
+        yaml = pyyaml
+
+
+class RecipeError(ValueError):
+    """Invalid recipe definition"""
+
+
+def _selector(value, path):
+    """Validate a CSS selector at compile time"""
+    if not isinstance(value, str) or not value.strip():
+        raise RecipeError(f"{path}: expected a CSS selector")
+    try:
+        compile_selector(value)
+    except ValueError as e:
+        raise RecipeError(f"{path}: {e}")
+    return value
+
+
+class RecipeRun:
+    """State of one recipe execution on one page"""
+
+    def __init__(self, scraper, url, extract_from):
+        self.scraper = scraper
+        self.url = url
+        self.extract_from = extract_from
+        self.data = {}
+        self.previous_url = None
+        self._snapshot = None
+
+    def snapshot(self):
+        # One parse per page state, shared by all extract/follow steps
+        if self._snapshot is None:
+            self._snapshot = self.scraper.snapshot()
+        return self._snapshot
+
+    def page_changed(self):
+        self._snapshot = None
+
+
+class NavigateStep:
+    def __init__(self, value, path):
+        if not isinstance(value, str):
+            raise RecipeError(f"{path}: expected a URL template such as '{{url}}'")
+        self.template = value
+
+    def run(self, run):
+        run.previous_url = run.scraper.driver.current_url
+        run.scraper.navigate(self.template.format(url=run.url))
+        run.page_changed()
+
+
+class ClickStep:
+    def __init__(self, value, path):
+        if isinstance(value, str):
+            value = {"selector": value}
+        if not isinstance(value, dict):
+            raise RecipeError(f"{path}: expected a selector or a mapping with 'selector'")
+        self.selector = _selector(value.get("selector"), f"{path}.selector")
+        # Optional clicks are skipped when the element is missing (e.g. cookie banners)
+        self.optional = bool(value.get("optional", False))
+
+    def run(self, run):
+        if self.optional and not run.scraper.element_exists(self.selector):
+            return
+        run.previous_url = run.scraper.driver.current_url
+        run.scraper.click(self.selector)
+        run.page_changed()
+
+
+class WaitStep:
+    def __init__(self, value, path):
+        try:
+            self.strategy = WaitStrategy.from_config(value)
+        except (TypeError, ValueError) as e:
+            raise RecipeError(f"{path}: {e}")
+        if self.strategy.selector:
+            _selector(self.strategy.selector, f"{path}.selector")
+
+    def run(self, run):
+        scraper = run.scraper
+        seconds, met = self.strategy.wait(scraper.driver, run.previous_url, read_log=scraper.read_performance_log)
+        scraper.wait_log.append({"step": "recipe", "kind": self.strategy.kind, "seconds": seconds, "met": met})
+        run.page_changed()
+
+
+class ExtractStep:
+    """
+    Fields as name -> selector or name -> {"selector", "attrs", "multiple"}.
+    A field is the text of the first match (None if nothing matches), a
+    list with "multiple", and {"text", <attr>: value} dicts with "attrs".
+    """
+
+    def __init__(self, value, path):
+        if not isinstance(value, dict) or not value:
+            raise RecipeError(f"{path}: expected a mapping of field name to selector")
+        for name, field in value.items():
+            selector = field if isinstance(field, str) else (field or {}).get("selector")
+            _selector(selector, f"{path}.{name}")
+        self.spec = extraction_spec(value)
+        self.multiple = {name: multiple for name, _, _, multiple in self.spec}
+
+    def run(self, run):
+        source = run.snapshot() if run.extract_from == "snapshot" else run.scraper
+        for name, result in source.extract_spec(self.spec).items():
+            if result.get("error"):
+                raise RecipeError(f"Invalid selector for {name}: {result['error']}")
+            values = [dict(match["attrs"], text=match["text"]) if match["attrs"] else match["text"]
+                      for match in result["matches"]]
+            run.data[name] = values if self.multiple[name] else (values[0] if values else None)
+
+
+class FollowStep:
+    """
+    Run nested steps on links found on the page, e.g.
+    {"selector": "a.product", "limit": 10, "name": "products", "steps": [...]}.
+    Results are collected as a list under `name`.
+    """
+
+    def __init__(self, value, path):
+        if not isinstance(value, dict):
+            raise RecipeError(f"{path}: expected a mapping with 'selector' and 'steps'")
+        self.selector = _selector(value.get("selector"), f"{path}.selector")
+        self.attr = value.get("attr", "href")
+        self.limit = value.get("limit")
+        self.name = value.get("name", "links")
+        if self.limit is not None and (not isinstance(self.limit, int) or self.limit < 0):
+            raise RecipeError(f"{path}.limit: expected a non-negative integer")
+        self.steps = compile_steps(value.get("steps", []), f"{path}.steps")
+        self.spec = extraction_spec({"links": {"selector": self.selector, "attrs": [self.attr], "multiple": True}})
+
+    def run(self, run):
+        base = run.scraper.driver.current_url
+        matches = run.snapshot().extract_spec(self.spec)["links"]["matches"]
+        links = []
+        for match in matches:
+            href = match["attrs"].get(self.attr)
+            if href and not href.startswith(("javascript:", "mailto:", "#")):
+                links.append(urljoin(base, href))
+        links = list(dict.fromkeys(links))[:self.limit]
+
+        results = []
+        for link in links:
+            child = RecipeRun(run.scraper, link, run.extract_from)
+            try:
+                for step in self.steps:
+                    step.run(child)
+                results.append(dict(child.data, url=link))
+            except Exception as e:
+                results.append({"url": link, "error": str(e)})
+        run.data[self.name] = results
+
+
+STEPS = {
+    "navigate": NavigateStep,
+    "click": ClickStep,
+    "wait": WaitStep,
+    "extract": ExtractStep,
+    "follow": FollowStep,
+}
+
+
+def compile_steps(steps, path="steps"):
+    """Validate step definitions and turn them into step objects"""
+    if not isinstance(steps, list):
+        raise RecipeError(f"{path}: expected a list of steps")
+    compiled = []
+    for i, step in enumerate(steps):
+        if not isinstance(step, dict) or len(step) != 1:
+            raise RecipeError(f"{path}[{i}]: a step is a mapping with one key ({', '.join(STEP_KINDS)})")
+        kind, value = next(iter(step.items()))
+        if kind not in STEPS:
+            raise RecipeError(f"{path}[{i}]: unknown step '{kind}'. Available steps: {', '.join(STEP_KINDS)}")
+        compiled.append(STEPS[kind](value, f"{path}[{i}].{kind}"))
+    # Every page starts by loading its URL unless the recipe says otherwise
+    if not compiled or not isinstance(compiled[0], NavigateStep):
+        compiled.insert(0, NavigateStep("{url}", path))
+    return compiled
+
+
+class Recipe:
+    """
+    Declarative extraction recipe, validated and compiled once and then run
+    on any number of pages. Selectors are checked (and cached compiled) and
+    wait strategies built at compile time.
+
+    Example (YAML):
+        name: products
+        extract_from: snapshot    # or 'browser' (one execute_script per step)
+        steps:
+          - click: {selector: "button.accept-cookies", optional: true}
+          - wait: {kind: selector, selector: ".product", timeout: 10}
+          - extract:
+              title: h1
+              prices: {selector: ".price", multiple: true}
+          - follow:
+              selector: "a.product"
+              limit: 5
+              name: products
+              steps:
+                - extract: {name: h1, image: {selector: "img", attrs: [src]}}
+    """
+
+    def __init__(self, definition, name=None):
+        if not isinstance(definition, dict):
+            raise RecipeError("A recipe is a mapping with a 'steps' list")
+        self.name = definition.get("name", name or "recipe")
+        self.extract_from = definition.get("extract_from", "snapshot")
+        if self.extract_from not in EXTRACT_SOURCES:
+            raise RecipeError(f"extract_from: expected one of {', '.join(EXTRACT_SOURCES)}")
+        self.steps = compile_steps(definition.get("steps"))
+
+    @classmethod
+    def load(cls, path):
+        """Load a recipe from a .json, .yaml or .yml file"""
+        with open(path, encoding="utf-8") as f:
+            if path.endswith((".yaml", ".yml")):
+                load_yaml()
+                try:
+                    definition = yaml.safe_load(f)
+                except yaml.YAMLError as e:
+                    # Not a ValueError: callers only catch RecipeError/ValueError
+                    raise RecipeError(f"Invalid YAML: {e}")
+            else:
+                definition = json.load(f)
+        return cls(definition, name=os.path.splitext(os.path.basename(path))[0])
+
+    def run(self, scraper, url):
+        """
+        Run the recipe on one URL. `scraper` is a WebScraper or a
+        BrowserPool (a session is leased for the run).
+        Returns {"success", "url", "data"} or {"success", "url", "error"}.
+        """
+        if hasattr(scraper, "lease"):
+            with scraper.lease() as session:
+                return self.run(session, url)
+
+        run = RecipeRun(scraper, url, self.extract_from)
+        try:
+            for step in self.steps:
+                step.run(run)
+            return {"success": True, "url": url, "data": run.data}
+        except Exception as e:
+            return {"success": False, "url": url, "error": str(e), "data": run.data}
+
+    def run_many(self, pool, urls, workers=4, per_host=2, max_in_flight=100):
+        """Run the recipe over many URLs with a BrowserPool; yields results in completion order"""
+        return crawl(urls, lambda url: self.run(pool, url), workers=workers,
+                     per_host=per_host, max_in_flight=max_in_flight)
@@ -0,0 +1,176 @@
+# scraper/resource_policy.py
+
+import json
+import threading
+from urllib.parse import urlparse
+
+# URL patterns per resource type (Network.setBlockedURLs only matches URLs,
+# so types are blocked by file extension, with and without a query string)
+TYPE_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"],
+    "media": ["mp4", "webm", "ogg", "mp3", "wav", "m4a", "mov", "m3u8"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheet": ["css"],
+}
+
+# Analytics, advertising and tracking hosts
+TRACKER_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googlesyndication.com*",
+    "*googleadservices.com*",
+    "*doubleclick.net*",
+    "*adservice.google.*",
+    "*connect.facebook.net*",
+    "*amazon-adsystem.com*",
+    "*scorecardresearch.com*",
+    "*hotjar.com*",
+    "*taboola.com*",
+    "*outbrain.com*",
+    "*criteo.com*",
+    "*adnxs.com*",
+]
+
+RESOURCE_PRESETS = {
+    "none": {"types": [], "trackers": False},
+    "no-trackers": {"types": [], "trackers": True},
+    "no-media": {"types": ["image", "media", "font"], "trackers": True},
+    # Scripts stay enabled: pages rendered in the browser usually need them
+    "text-only": {"types": ["image", "media", "font", "stylesheet"], "trackers": True},
+}
+
+# Typical transfer size per CDP resource type, used to estimate the bytes
+# blocked requests would have downloaded
+TYPICAL_RESOURCE_BYTES = {
+    "Image": 25_000,
+    "Media": 500_000,
+    "Font": 30_000,
+    "Stylesheet": 15_000,
+    "Script": 25_000,
+}
+DEFAULT_RESOURCE_BYTES = 5_000
+
+
+def type_patterns(resource_type):
+    if resource_type not in TYPE_EXTENSIONS:
+        raise ValueError(f"Unknown resource type: {resource_type}. Available types: {', '.join(TYPE_EXTENSIONS)}")
+    patterns = []
+    for extension in TYPE_EXTENSIONS[resource_type]:
+        patterns += [f"*.{extension}", f"*.{extension}?*"]
+    return patterns
+
+
+def compile_rule(rule):
+    """
+    Turn a rule into a list of URL patterns. A rule is a preset name or a
+    dict with "preset", "types" (extra resource types), "trackers" and
+    "block" (extra URL patterns, '*' is a wildcard).
+    """
+    if isinstance(rule, str):
+        rule = {"preset": rule}
+    preset_name = rule.get("preset", "none")
+    if preset_name not in RESOURCE_PRESETS:
+        raise ValueError(f"Unknown resource preset: {preset_name}. Available presets: {', '.join(RESOURCE_PRESETS)}")
+    preset = RESOURCE_PRESETS[preset_name]
+
+    patterns = []
+    for resource_type in preset["types"] + rule.get("types", []):
+        patterns += type_patterns(resource_type)
+    if rule.get("trackers", preset["trackers"]):
+        patterns += TRACKER_PATTERNS
+    patterns += rule.get("block", [])
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(patterns))
+
+
+class ResourcePolicy:
+    """
+    Which requests headless Chrome should not make, applied with CDP
+    Network.setBlockedURLs before each navigation.
+
+    Config (config['resource_policy']) is a preset name or a dict:
+        {
+            "preset": "text-only",
+            "block": ["*/ads/*"],
+            "domains": {
+                "shop.example.com": "no-media",
+                "maps.example.com": {"preset": "none"},
+            },
+        }
+    A domain rule replaces the default rule for that host and its subdomains.
+    """
+
+    def __init__(self, rule="none", domains=None):
+        self.default = compile_rule(rule)
+        self.domains = {domain.lower(): compile_rule(value) for domain, value in (domains or {}).items()}
+
+    @classmethod
+    def from_config(cls, value):
+        if isinstance(value, cls):
+            return value
+        if value is None or isinstance(value, str):
+            return cls(value or "none")
+        value = dict(value)
+        domains = value.pop("domains", None)
+        return cls(value, domains)
+
+    def patterns_for(self, url):
+        """URL patterns to block while loading `url`"""
+        host = (urlparse(url).hostname or "").lower()
+        # Most specific domain wins
+        for domain in sorted(self.domains, key=len, reverse=True):
+            if host == domain or host.endswith("." + domain):
+                return self.domains[domain]
+        return self.default
+
+    @property
+    def active(self):
+        return bool(self.default) or any(self.domains.values())
+
+
+class ResourceStats:
+    """
+    Counts blocked and loaded requests from CDP network events in Chrome's
+    performance log. Blocked requests never download anything, so the bytes
+    saved are an estimate based on TYPICAL_RESOURCE_BYTES.
+    """
+
+    def __init__(self):
+        self.blocked = 0
+        self.blocked_by_type = {}
+        self.bytes_saved = 0
+        self.loaded = 0
+        self.bytes_loaded = 0
+        self._types = {}
+        self._lock = threading.Lock()
+
+    def record(self, entries):
+        """Update the counters from performance log entries"""
+        with self._lock:
+            for entry in entries:
+                message = json.loads(entry["message"])["message"]
+                params = message.get("params", {})
+                request_id = params.get("requestId")
+                if message["method"] == "Network.requestWillBeSent":
+                    self._types[request_id] = params.get("type", "Other")
+                elif message["method"] == "Network.loadingFinished":
+                    self._types.pop(request_id, None)
+                    self.loaded += 1
+                    self.bytes_loaded += int(params.get("encodedDataLength", 0))
+                elif message["method"] == "Network.loadingFailed":
+                    resource_type = self._types.pop(request_id, params.get("type", "Other"))
+                    # "inspector" is the reason given for Network.setBlockedURLs
+                    if params.get("blockedReason") == "inspector":
+                        self.blocked += 1
+                        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+                        self.bytes_saved += TYPICAL_RESOURCE_BYTES.get(resource_type, DEFAULT_RESOURCE_BYTES)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "blocked": self.blocked,
+                "blocked_by_type": dict(self.blocked_by_type),
+                "bytes_saved": self.bytes_saved,
+                "loaded": self.loaded,
+                "bytes_loaded": self.bytes_loaded,
+            }
@@ -1,3 +1,160 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from django.test import SimpleTestCase
+from scraper.captcha_service import CaptchaError, TwoCaptchaService
 
-# Create your tests here.
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def run_python(script):
+    """Run a script in a fresh interpreter (so imports are not cached) and return its JSON output"""
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_DIR))
+    with tempfile.TemporaryDirectory() as cwd:
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=cwd, env=env,
+            capture_output=True, text=True, check=True
+        )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+class StartupTimeTests(SimpleTestCase):
+    """Guard CLI startup time against eager loading of the NLP stack"""
+
+    HEAVY_MODULES = ["spacy", "textblob", "pandas"]
+    MAX_IMPORT_SECONDS = 3.0
+
+    def measure_import(self, module):
+        script = (
+            "import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            f"import {module}\n"
+            "seconds = time.perf_counter() - start\n"
+            f"loaded = [m for m in {self.HEAVY_MODULES!r} if m in sys.modules]\n"
+            "print(json.dumps({'seconds': seconds, 'loaded': loaded}))"
+        )
+        return run_python(script)
+
+    def test_data_processing_import_is_lazy(self):
+        result = self.measure_import("scraper.data_processing")
+        self.assertEqual(result["loaded"], [])
+        self.assertLess(result["seconds"], self.MAX_IMPORT_SECONDS)
+
+    def test_scraper_command_import_is_lazy(self):
+        result = self.measure_import("scraper.management.commands.scraper")
+        self.assertEqual(result["loaded"], [])
+        self.assertLess(result["seconds"], self.MAX_IMPORT_SECONDS)
+
+
+class FakeTwoCaptcha(BaseHTTPRequestHandler):
+    """
+    Minimal 2Captcha API: in.php hands out task ids, res.php answers
+    batched ?ids= requests. Tasks whose payload contains "unsolvable" fail,
+    "never" stays unsolved, everything else is solved after `solve_after` polls.
+    """
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("latin-1")
+        server = self.server
+        with server.lock:
+            server.next_id += 1
+            task_id = str(server.next_id)
+            server.tasks[task_id] = {"polls": 0, "body": body}
+        self.reply(f"OK|{task_id}")
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        if query.get("key") != ["test-key"]:
+            return self.reply("ERROR_WRONG_USER_KEY")
+        server = self.server
+        ids = query["ids"][0].split(",")
+        results = []
+        with server.lock:
+            server.batches.append(ids)
+            for task_id in ids:
+                task = server.tasks[task_id]
+                task["polls"] += 1
+                if "unsolvable" in task["body"]:
+                    results.append("ERROR_CAPTCHA_UNSOLVABLE")
+                elif "never" in task["body"] or task["polls"] < server.solve_after:
+                    results.append("CAPCHA_NOT_READY")
+                else:
+                    results.append(f"solution-{task_id}")
+        self.reply("|".join(results))
+
+    def reply(self, text):
+        data = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TwoCaptchaServiceTests(SimpleTestCase):
+    """TwoCaptchaService against a local fake 2Captcha server"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTwoCaptcha)
+        self.server.lock = threading.Lock()
+        self.server.tasks = {}
+        self.server.batches = []
+        self.server.next_id = 0
+        self.server.solve_after = 2
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def make_service(self, api_key="test-key", timeout=5.0):
+        service = TwoCaptchaService(api_key, self.base_url, poll_interval=0.05, timeout=timeout)
+        self.addCleanup(service.close)
+        return service
+
+    def test_pending_tasks_are_polled_in_one_batch(self):
+        service = self.make_service()
+        futures = [service.submit_recaptcha(f"site-{i}", "https://example.com") for i in range(5)]
+        self.assertEqual([f.result(5) for f in futures], [f"solution-{i}" for i in range(1, 6)])
+        # Every poll asked for all outstanding tasks at once
+        self.assertIn(["1", "2", "3", "4", "5"], self.server.batches)
+        self.assertLessEqual(len(self.server.batches), 3)
+        self.assertEqual(service.pending(), 0)
+
+    def test_submit_does_not_block(self):
+        self.server.solve_after = 3
+        service = self.make_service()
+        future = service.submit_image(b"\x89PNG fake image")
+        self.assertFalse(future.done())
+        self.assertEqual(future.result(5), "solution-1")
+
+    def test_unsolvable_task_fails_only_its_future(self):
+        service = self.make_service()
+        good = service.submit_hcaptcha("site", "https://example.com")
+        bad = service.submit_hcaptcha("unsolvable", "https://example.com")
+        wait([good, bad], timeout=5)
+        self.assertEqual(good.result(), "solution-1")
+        self.assertRaises(CaptchaError, bad.result)
+
+    def test_timeout(self):
+        service = self.make_service(timeout=0.2)
+        future = service.submit_recaptcha("never", "https://example.com")
+        self.assertRaises(TimeoutError, future.result, 5)
+
+    def test_account_error_fails_every_task(self):
+        service = self.make_service(api_key="wrong-key")
+        futures = [service.submit_recaptcha(f"site-{i}", "https://example.com") for i in range(2)]
+        for future in futures:
+            with self.assertRaisesRegex(CaptchaError, "ERROR_WRONG_USER_KEY"):
+                future.result(5)
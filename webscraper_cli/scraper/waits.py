@@ -0,0 +1,129 @@
+# scraper/waits.py
+
+import json
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+WAIT_KINDS = ["none", "dom_ready", "network_idle", "url_change", "selector"]
+
+# CDP events (from Chrome's performance log) that start / end a request
+REQUEST_STARTED = "Network.requestWillBeSent"
+REQUEST_ENDED = ("Network.loadingFinished", "Network.loadingFailed")
+
+
+class WaitStrategy:
+    """
+    Waits for a page condition instead of sleeping a fixed time.
+
+    Kinds:
+        none          - return immediately
+        dom_ready     - document.readyState is "complete"
+        network_idle  - at most `max_connections` requests in flight for
+                        `idle_time` seconds (uses CDP network events from the
+                        performance log, see create_driver)
+        url_change    - current URL differs from the URL before the action
+        selector      - element matching `selector` is present
+
+    `fallback` (a kind name or dict) is waited for when the condition is not
+    met in time, e.g. url_change with a network_idle fallback for actions
+    that may or may not navigate.
+    """
+
+    def __init__(self, kind="dom_ready", timeout=10, selector=None, idle_time=0.5, max_connections=0, poll=0.1,
+                 fallback=None):
+        if kind not in WAIT_KINDS:
+            raise ValueError(f"Unknown wait kind: {kind}. Available kinds: {', '.join(WAIT_KINDS)}")
+        if kind == "selector" and not selector:
+            raise ValueError("Wait kind 'selector' needs a selector")
+        self.kind = kind
+        self.timeout = timeout
+        self.selector = selector
+        self.idle_time = idle_time
+        self.max_connections = max_connections
+        self.poll = poll
+        self.fallback = WaitStrategy.from_config(fallback) if fallback else None
+
+    @classmethod
+    def from_config(cls, value):
+        """Build a strategy from a kind name, a dict of arguments or an existing strategy"""
+        if isinstance(value, cls):
+            return value
+        if value is None:
+            return cls("none")
+        if isinstance(value, str):
+            return cls(value)
+        return cls(**value)
+
+    def wait(self, driver, previous_url=None, read_log=None):
+        """
+        Wait until the condition holds or the timeout expires.
+        Returns (seconds waited, True if the condition was met).
+
+        `read_log` drains the performance log (default: driver.get_log),
+        so other consumers of the log can see the entries read here.
+        """
+        start = time.monotonic()
+        if self.kind == "none":
+            return 0.0, True
+        try:
+            if self.kind == "network_idle":
+                met = self._network_idle(driver, start, read_log)
+            else:
+                WebDriverWait(driver, self.timeout, poll_frequency=self.poll).until(self._condition(previous_url))
+                met = True
+        except TimeoutException:
+            met = False
+        if not met and self.fallback:
+            _, met = self.fallback.wait(driver, previous_url, read_log)
+        return time.monotonic() - start, met
+
+    def _condition(self, previous_url):
+        if self.kind == "dom_ready":
+            return lambda d: d.execute_script("return document.readyState") == "complete"
+        if self.kind == "url_change":
+            return lambda d: d.current_url != previous_url
+        return EC.presence_of_element_located((By.CSS_SELECTOR, self.selector))
+
+    def _network_idle(self, driver, start, read_log=None):
+        in_flight = set()
+        last_activity = time.monotonic()
+        resource_count = None
+
+        while time.monotonic() - start < self.timeout:
+            if read_log:
+                entries = read_log()
+            else:
+                try:
+                    entries = driver.get_log("performance")
+                except WebDriverException:
+                    entries = None
+
+            if entries is not None:
+                for entry in entries:
+                    message = json.loads(entry["message"])["message"]
+                    request_id = message.get("params", {}).get("requestId")
+                    if message["method"] == REQUEST_STARTED:
+                        in_flight.add(request_id)
+                        last_activity = time.monotonic()
+                    elif message["method"] in REQUEST_ENDED:
+                        in_flight.discard(request_id)
+                        last_activity = time.monotonic()
+                busy = len(in_flight) > self.max_connections
+            else:
+                # Performance log not enabled: treat a stable number of
+                # loaded resources on a complete document as idle
+                state, count = driver.execute_script(
+                    "return [document.readyState, performance.getEntriesByType('resource').length]"
+                )
+                if count != resource_count:
+                    resource_count = count
+                    last_activity = time.monotonic()
+                busy = state != "complete"
+
+            if not busy and time.monotonic() - last_activity >= self.idle_time:
+                return True
+            time.sleep(self.poll)
+        return False
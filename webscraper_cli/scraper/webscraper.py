@@ -4,47 +4,143 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 from scraper.captacha_solver import CaptchaSolver
-import time
+from scraper.waits import WaitStrategy
+from scraper.resource_policy import ResourcePolicy, ResourceStats
+from scraper.extraction import EXTRACT_MANY_JS, Snapshot, extraction_spec
+from collections import deque
+from urllib.parse import urlsplit
 
 
+# Waits used after actions, overridable with config['waits'][step]
+DEFAULT_WAITS = {
+    # After a solved CAPTCHA the form is submitted and the page reloads
+    "after_captcha": {"kind": "dom_ready", "timeout": 10},
+    # Gives the page a chance to show a CAPTCHA after a click; readyState is
+    # already "complete" after most clicks, so wait for the requests to settle
+    "after_click": {"kind": "network_idle", "timeout": 5},
+    # Login forms usually redirect after a successful submit; logins that
+    # stay on the same URL wait for their requests to settle instead
+    "after_login": {"kind": "url_change", "timeout": 3, "fallback": {"kind": "network_idle", "timeout": 5}},
+}
+
+
+def wait_config(config):
+    """Merge config['waits'] over DEFAULT_WAITS and build the strategies"""
+    waits = dict(DEFAULT_WAITS, **(config or {}).get('waits', {}))
+    return {step: WaitStrategy.from_config(value) for step, value in waits.items()}
+
+
+def url_origin(url):
+    """scheme://host[:port] of an http(s) URL, None for other URLs"""
+    parts = urlsplit(url or "")
+    if parts.scheme in ("http", "https") and parts.netloc:
+        return f"{parts.scheme}://{parts.netloc}"
+    return None
+
+
+def performance_log_enabled(config):
+    """CDP network events are only needed to detect network idle and count blocked requests"""
+    strategies = list(wait_config(config).values())
+    strategies += [wait.fallback for wait in strategies if wait.fallback]
+    if any(wait.kind == "network_idle" for wait in strategies):
+        return True
+    return ResourcePolicy.from_config((config or {}).get('resource_policy')).active
+
+
+def create_driver(config=None):
+    """Launch a new headless Chrome driver"""
+    # Browser settings (Chrome) in headless mode
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    
+    if performance_log_enabled(config):
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    
+    return webdriver.Chrome(options=options)
+
 
 class WebScraper:
-    def __init__(self, config=None):
-        # Browser settings (Chrome) in headless mode
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        
-        self.driver = webdriver.Chrome(options=options)
+    def __init__(self, config=None, driver=None):
         self.config = config or {}
+        # Reuse an already running browser (e.g. leased from BrowserPool) if given
+        self.driver = driver or create_driver(self.config)
+        
+        # Number of pages loaded by this browser session and the origins
+        # they came from (BrowserPool clears their storage between leases)
+        self.page_loads = 0
+        self.visited_origins = set()
+        
+        # Wait strategies per step and the time recent waits actually took
+        self.waits = wait_config(self.config)
+        self.wait_log = deque(maxlen=100)
+        
+        # Requests Chrome should not make (images, fonts, trackers...) and
+        # counters of what was blocked; BrowserPool shares one ResourceStats
+        self.resource_policy = ResourcePolicy.from_config(self.config.get('resource_policy'))
+        self.resource_stats = ResourceStats()
+        self._blocked_urls = []
+        # Chrome buffers the performance log until it is read, so it is
+        # drained on every navigation to keep only the current page's events
+        self.performance_log = performance_log_enabled(self.config)
         
         # Initialize CAPTCHA solver
         self.captcha_solver = CaptchaSolver(self.driver, self.config.get('captcha', {}))
 
     def navigate(self, url: str):
         """Navigate to specified URL and handle any CAPTCHAs encountered"""
+        self.apply_resource_policy(url)
         self.driver.get(url)
+        self.page_loads += 1
+        self.visited_origins.update((url_origin(url), url_origin(self.driver.current_url)))
+        if self.performance_log:
+            self.read_performance_log()
         
         # Check for and solve CAPTCHA if auto_solve is enabled
         if self.config.get('auto_solve_captcha', True):
             captcha_info = self.captcha_solver.detect_captcha()
             if captcha_info:
                 print(f"CAPTCHA detected on {url} - attempting to solve automatically")
+                previous_url = self.driver.current_url
                 solved = self.captcha_solver.solve_captcha(captcha_info)
                 if solved:
                     print("CAPTCHA solved successfully!")
-                    # Wait a bit for page to load after CAPTCHA solution
-                    time.sleep(3)
+                    # Wait for page to load after CAPTCHA solution
+                    self.wait("after_captcha", previous_url)
                 else:
                     print("Failed to solve CAPTCHA automatically")
         
         return self
 
+    def apply_resource_policy(self, url: str):
+        """Block the requests the resource policy lists for the URL's domain"""
+        patterns = self.resource_policy.patterns_for(url)
+        if patterns == self._blocked_urls:
+            return
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+            self._blocked_urls = patterns
+        except (WebDriverException, AttributeError) as e:
+            print(f"Could not apply resource policy: {e}")
+
+    def read_performance_log(self):
+        """
+        Drain Chrome's performance log, counting blocked requests.
+        Returns the entries, or None if the log is not enabled.
+        """
+        try:
+            entries = self.driver.get_log("performance")
+        except (WebDriverException, AttributeError):
+            return None
+        self.resource_stats.record(entries)
+        return entries
+
     def element_exists(self, css_selector: str) -> bool:
         """Check if element exists on the page"""
         try:
@@ -58,6 +154,17 @@ class WebScraper:
         wait = WebDriverWait(self.driver, timeout)
         return wait.until(EC.presence_of_element_located((by, identifier)))
 
+    def wait(self, step: str, previous_url: str = None) -> float:
+        """Run the wait strategy configured for a step; returns seconds waited"""
+        strategy = self.waits.get(step)
+        if strategy is None:
+            return 0.0
+        seconds, met = strategy.wait(self.driver, previous_url, read_log=self.read_performance_log)
+        self.wait_log.append({"step": step, "kind": strategy.kind, "seconds": seconds, "met": met})
+        if not met:
+            print(f"Wait '{strategy.kind}' for {step} timed out after {seconds:.1f}s")
+        return seconds
+
     def execute_js(self, script: str):
         """Execute JavaScript code on page"""
         return self.driver.execute_script(script)
@@ -65,11 +172,12 @@ class WebScraper:
     def click(self, css_selector: str):
         """Click on element specified by CSS selector"""
         element = self.driver.find_element(By.CSS_SELECTOR, css_selector)
+        previous_url = self.driver.current_url
         element.click()
         
         # Check for CAPTCHA after clicking
         if self.config.get('auto_solve_captcha', True):
-            time.sleep(1)  # Give page a moment to possibly show CAPTCHA
+            self.wait("after_click", previous_url)  # Give page a moment to possibly show CAPTCHA
             captcha_info = self.captcha_solver.detect_captcha()
             if captcha_info:
                 print("CAPTCHA detected after clicking - attempting to solve")
@@ -86,6 +194,25 @@ class WebScraper:
         element = self.driver.find_element(By.CSS_SELECTOR, css_selector)
         return element.text
 
+    def extract_many(self, selectors, attrs=None, multiple=False) -> dict:
+        """
+        Extract text and attributes for several selectors in a single
+        execute_script call (see extraction_spec for the accepted forms).
+
+        Returns {name: {"selector", "count", "matches": [{"text", "attrs"}]}};
+        only the first match is returned unless `multiple` is set, and an
+        invalid selector gets an "error" entry instead of failing the call.
+        """
+        return self.extract_spec(extraction_spec(selectors, attrs, multiple))
+
+    def extract_spec(self, spec) -> dict:
+        """extract_many for a spec already normalized with extraction_spec"""
+        return self.driver.execute_script(EXTRACT_MANY_JS, spec)
+
+    def snapshot(self) -> Snapshot:
+        """Capture the rendered HTML for offline extraction (see Snapshot)"""
+        return Snapshot(self.driver.page_source, self.driver.current_url)
+
     def close(self):
         """Close browser"""
         self.driver.quit()
@@ -120,6 +247,7 @@ class WebScraper:
                 continue
         
         # Check for CAPTCHA before submitting
+        previous_url = self.driver.current_url
         captcha_info = self.captcha_solver.detect_captcha()
         if captcha_info:
             print("CAPTCHA detected on login form - attempting to solve")
@@ -135,7 +263,7 @@ class WebScraper:
                     continue
         
         # Check for CAPTCHA after submission
-        time.sleep(2)  # Wait for possible CAPTCHA
+        self.wait("after_login", previous_url)  # Wait for possible CAPTCHA
         captcha_info = self.captcha_solver.detect_captcha()
         if captcha_info:
             print("CAPTCHA detected after login submission - attempting to solve")
@@ -143,4 +271,4 @@ class WebScraper:
         
         return self
 
-    
\ No newline at end of file
+    
\ No newline at end of file